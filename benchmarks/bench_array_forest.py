@@ -0,0 +1,98 @@
+"""
+Check that the NumPy array export of the Isolation Forest reproduces sklearn
+exactly, and compare cold-start load time and batch scoring speed.
+
+Run from the repository root:
+    python -m benchmarks.bench_array_forest --rows 10000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scripts import anomaly_detection, preprocessing
+from scripts.array_forest import ArrayIsolationForest, export_isolation_forest
+
+DATA_FILE = "./data/synthetic_cloudwatch_metrics.csv"
+
+LOAD_PICKLE = """
+import time
+start = time.perf_counter()
+import joblib
+model = joblib.load({path!r})
+print(time.perf_counter() - start)
+"""
+
+LOAD_ARRAYS = """
+import time
+start = time.perf_counter()
+from array_forest import ArrayIsolationForest
+model = ArrayIsolationForest.load({path!r})
+print(time.perf_counter() - start)
+"""
+
+
+def cold_load_seconds(code, runs=5):
+    """
+    Time imports plus artifact load in a fresh interpreter, like a Lambda cold start.
+    """
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", code], capture_output=True, text=True,
+                                check=True, cwd=os.path.join(os.path.dirname(__file__), "..", "lambda_deploy"))
+        times.append(float(output.stdout.strip()))
+    return min(times)
+
+
+def timed(func, *args, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="test rows to score")
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_FILE)
+    X, y, scaler, pipeline = preprocessing.preprocess_dataframe(df, n_components=5, mi_method="binned", n_jobs=1)
+    model = anomaly_detection.build_anomaly_detection_model().fit(X)
+
+    tmp_dir = tempfile.mkdtemp()
+    pickle_path = os.path.join(tmp_dir, "anomaly_model.pkl")
+    array_path = os.path.join(tmp_dir, "anomaly_model.npz")
+    joblib.dump(model, pickle_path)
+    export_isolation_forest(model, array_path)
+    forest = ArrayIsolationForest.load(array_path)
+
+    # Test set: resampled rows plus noise, so it includes points unseen in training
+    rng = np.random.default_rng(0)
+    X_test = X[rng.integers(0, len(X), args.rows)] + rng.normal(0, 0.1, (args.rows, X.shape[1]))
+
+    sk_scores, sk_time = timed(model.score_samples, X_test)
+    array_scores, array_time = timed(forest.score_samples, X_test)
+    print(f"score_samples identical: {np.array_equal(sk_scores, array_scores)}")
+    print(f"predict identical:       {np.array_equal(model.predict(X_test), forest.predict(X_test))}")
+    print(f"Scoring {args.rows} rows: sklearn {sk_time * 1000:.1f} ms, arrays {array_time * 1000:.1f} ms")
+    _, sk_single = timed(model.score_samples, X_test[:1], repeat=50)
+    _, array_single = timed(forest.score_samples, X_test[:1], repeat=50)
+    print(f"Scoring 1 row: sklearn {sk_single * 1000:.2f} ms, arrays {array_single * 1000:.2f} ms")
+
+    print(f"Artifact size: pickle {os.path.getsize(pickle_path) / 1024:.0f} KiB, "
+          f"arrays {os.path.getsize(array_path) / 1024:.0f} KiB")
+    _, array_load = timed(ArrayIsolationForest.load, array_path, repeat=20)
+    print(f"Array artifact load (warm interpreter): {array_load * 1000:.2f} ms")
+    print(f"Cold load (imports + artifact): pickle {cold_load_seconds(LOAD_PICKLE.format(path=pickle_path)) * 1000:.0f} ms, "
+          f"arrays {cold_load_seconds(LOAD_ARRAYS.format(path=array_path)) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
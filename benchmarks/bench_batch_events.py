@@ -0,0 +1,91 @@
+"""
+Send the Lambda handler batch events ({"type": "batch", "requests": [...]}) of a
+growing number of mixed anomaly detection, predictive maintenance and log
+clustering requests, and compare with one invocation per request: latency per
+invocation, requests served per invocation-second and per-request cost.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_events --sizes 1 10 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+LAMBDA_DIR = os.path.join(os.path.dirname(__file__), "..", "lambda_deploy")
+LOG_MESSAGES = [
+    "Application started successfully",
+    "Database connection established",
+    "Disk usage nearing capacity",
+    "Unexpected error occurred in module X",
+    "High memory usage detected",
+    "Network latency exceeded threshold",
+    "Auto-scaling triggered new instance launch",
+]
+
+
+def synthetic_requests(n_requests, anomaly_features, regression_features, rng):
+    """
+    A mix of single requests: mostly predictive maintenance, as in the scheduled
+    health checks, plus anomaly detection on a few metric rows and small log batches.
+    """
+    requests = []
+    for kind in rng.choice(3, n_requests, p=[0.3, 0.5, 0.2]):
+        if kind == 0:
+            requests.append({"type": "anomaly_detection",
+                             "data": rng.uniform(0, 100, (rng.integers(1, 5), anomaly_features)).tolist()})
+        elif kind == 1:
+            requests.append({"type": "predictive_maintenance",
+                             "features": rng.uniform(0, 100, regression_features).tolist()})
+        else:
+            requests.append({"type": "log_clustering",
+                             "logs": [LOG_MESSAGES[i] for i in rng.integers(0, len(LOG_MESSAGES), 3)]})
+    return requests
+
+
+def timed(func, repeats):
+    """
+    Median wall time of func() in seconds.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # The handler loads its models from the bundle directory
+    os.chdir(LAMBDA_DIR)
+    sys.path.insert(0, os.getcwd())
+    import lambda_function
+
+    with np.load("anomaly_model.npz") as arrays:
+        anomaly_features = int(arrays["n_features"])
+    with np.load("trained_model.npz") as arrays:
+        regression_features = int(arrays["n_features"])
+    lambda_function.warm_up(list(lambda_function.BATCH_ROUTES))
+    rng = np.random.default_rng(0)
+
+    print(f"{'requests':>9}{'mode':>12}{'ms/invocation':>15}{'requests/s':>12}{'us/request':>12}")
+    for size in args.sizes:
+        requests = synthetic_requests(size, anomaly_features, regression_features, rng)
+        batch_seconds = timed(lambda: lambda_function.handler({"type": "batch", "requests": requests}, None),
+                              args.repeats)
+        single_seconds = timed(lambda: [lambda_function.handler(request, None) for request in requests],
+                               args.repeats)
+        for mode, seconds, invocations in (("batch", batch_seconds, 1), ("one-by-one", single_seconds, size)):
+            print(f"{size:>9}{mode:>12}{seconds / invocations * 1000:>15.2f}{size / seconds:>12,.0f}"
+                  f"{seconds / size * 1e6:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Replay log_clustering events (batches of messages drawn from a few hundred
+templates with variable fields) through the ClusterAssignmentCache and through the
+plain transform + predict the Lambda handler used, reporting per-event latency, hit
+rate and agreement (the cache classifies the normalized, field-masked text).
+
+Run from the repository root:
+    python -m benchmarks.bench_cluster_cache --events 2000 --event-size 100
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from benchmarks.bench_log_templates import synthetic_logs, synthetic_templates
+from scripts.cluster_cache import ClusterAssignmentCache
+from scripts.log_templates import VARIABLE_PATTERN
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--event-size", type=int, default=100)
+    parser.add_argument("--templates", type=int, default=300)
+    parser.add_argument("--cache-bytes", type=int, default=8 * 1024 * 1024)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    templates = synthetic_templates(args.templates, rng)
+    training = synthetic_logs(50_000, templates, rng)
+    vectorizer = TfidfVectorizer(stop_words="english").fit(training)
+    model = KMeans(n_clusters=8, random_state=42).fit(vectorizer.transform(training))
+    events = [synthetic_logs(args.event_size, templates, rng) for _ in range(args.events)]
+
+    start = time.perf_counter()
+    expected = [model.predict(vectorizer.transform(logs)) for logs in events]
+    plain_seconds = time.perf_counter() - start
+
+    cache = ClusterAssignmentCache(vectorizer, model, max_bytes=args.cache_bytes, mask_pattern=VARIABLE_PATTERN)
+    latencies = []
+    predicted = []
+    for logs in events:
+        event_start = time.perf_counter()
+        predicted.append(cache.predict(logs))
+        latencies.append(time.perf_counter() - event_start)
+    latencies = np.array(latencies) * 1000
+    predicted = np.concatenate(predicted)
+    agreement = np.mean(predicted == np.concatenate(expected))
+    normalized = [cache.normalize(message) for logs in events for message in logs]
+    normalized_agreement = np.mean(predicted == model.predict(vectorizer.transform(normalized)))
+
+    stats = cache.stats()
+    print(f"transform + predict: {plain_seconds / args.events * 1000:.2f} ms per {args.event_size}-message event")
+    print(f"cache: median {np.median(latencies):.3f} ms, p99 {np.percentile(latencies, 99):.3f} ms per event "
+          f"(first event {latencies[0]:.2f} ms)")
+    print(f"hit rate {stats['hit_rate']:.1%}, {stats['entries']} entries in {stats['bytes'] / 1024:.0f} KiB, "
+          f"{stats['evictions']} evictions")
+    print(f"Same cluster as the uncached model on the normalized messages for {normalized_agreement:.1%}, "
+          f"on the raw messages (variable fields not masked) for {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
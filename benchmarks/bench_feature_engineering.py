@@ -0,0 +1,72 @@
+"""
+Build forecasting features (lags, rolling mean/std/max/slope and a future target)
+for millions of synthetic metric rows spread over many instances, and compare with
+pandas groupby().rolling() on a slice.
+
+Run from the repository root:
+    python -m benchmarks.bench_feature_engineering --rows 2000000 --instances 500
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.feature_engineering import METRICS, build_forecast_features
+
+DATA_FILE = "./data/synthetic_cloudwatch_metrics.csv"
+
+
+def synthetic_fleet(n_rows, n_instances, rng):
+    """
+    Resample the recorded metrics into n_instances minute-by-minute series, shuffled.
+    """
+    df = pd.read_csv(DATA_FILE)
+    rows = rng.integers(0, len(df), n_rows)
+    fleet = pd.DataFrame({metric: df[metric].to_numpy()[rows] for metric in METRICS})
+    instance = rng.integers(0, n_instances, n_rows)
+    fleet["InstanceId"] = np.char.add("i-", instance.astype(str))
+    # Minute index per instance, as CloudWatch would report it
+    order = np.argsort(instance, kind="stable")
+    minute = np.empty(n_rows, dtype=np.int64)
+    minute[order] = np.arange(n_rows) - np.repeat(np.flatnonzero(np.r_[True, np.diff(instance[order]) != 0]),
+                                                   np.bincount(instance)[np.bincount(instance) > 0])
+    fleet["Timestamp"] = pd.Timestamp("2024-11-20") + pd.to_timedelta(minute, unit="min")
+    return fleet.sample(frac=1, random_state=0, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--instances", type=int, default=500)
+    parser.add_argument("--pandas-rows", type=int, default=100_000, help="rows for the pandas comparison")
+    args = parser.parse_args()
+
+    fleet = synthetic_fleet(args.rows, args.instances, np.random.default_rng(0))
+
+    start = time.perf_counter()
+    features, target = build_forecast_features(fleet, group_column="InstanceId")
+    elapsed = time.perf_counter() - start
+    print(f"Built {features.shape[1]} features for {len(features)} of {args.rows} rows "
+          f"({args.instances} instances) in {elapsed:.2f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+    # The same statistics with pandas rolling windows, on a slice
+    sample = fleet[fleet["InstanceId"].isin(fleet["InstanceId"].unique()[:max(1, args.instances * args.pandas_rows
+                                                                               // args.rows)])]
+    start = time.perf_counter()
+    grouped = sample.sort_values(["InstanceId", "Timestamp"]).groupby("InstanceId")[METRICS]
+    for window in (5, 15, 60):
+        rolling = grouped.rolling(window)
+        rolling.mean(), rolling.std(), rolling.max()
+        rolling.apply(lambda a: np.polyfit(np.arange(len(a)), a, 1)[0], raw=True)
+    for lag in (1, 5, 15):
+        grouped.shift(lag)
+    pandas_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    build_forecast_features(sample, group_column="InstanceId")
+    numpy_seconds = time.perf_counter() - start
+    print(f"{len(sample)} rows: pandas rolling {pandas_seconds:.2f}s, vectorized {numpy_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Group millions of clustered log lines into the per-cluster output file and its page
+index, and compare with the previous nested loop (one pass over every line per
+cluster) on a slice.
+
+Run from the repository root:
+    python -m benchmarks.bench_grouped_logs --lines 2000000 --clusters 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_log_templates import synthetic_logs, synthetic_templates
+from scripts.log_analysis import read_cluster_page, write_grouped_logs
+
+
+def nested_loop(log_clusters, processed_logs, output_file):
+    with open(output_file, "w") as file:
+        for cluster in range(max(log_clusters) + 1):
+            file.write(f"Cluster {cluster} Logs:\n")
+            for idx, log in enumerate(processed_logs):
+                if log_clusters[idx] == cluster:
+                    file.write(f"- {log}\n")
+            file.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--baseline-lines", type=int, default=200_000, help="lines for the nested-loop baseline")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    logs = synthetic_logs(args.lines, synthetic_templates(300, rng), rng)
+    log_clusters = rng.integers(0, args.clusters, args.lines)
+    directory = tempfile.mkdtemp()
+    output_file = os.path.join(directory, "log_clusters.txt")
+    index_file = os.path.join(directory, "log_clusters_index.jsonl")
+
+    start = time.perf_counter()
+    write_grouped_logs(log_clusters, logs, output_file, index_file)
+    elapsed = time.perf_counter() - start
+    print(f"Grouped output: {args.lines} lines, {args.clusters} clusters in {elapsed:.2f}s "
+          f"({args.lines / elapsed:,.0f} lines/s, {os.path.getsize(output_file) / 2 ** 20:.0f} MiB, "
+          f"index {os.path.getsize(index_file) / 1024:.0f} KiB)")
+
+    start = time.perf_counter()
+    page = read_cluster_page(args.clusters // 2, 10, output_file, index_file)
+    print(f"Reading page 10 of cluster {args.clusters // 2}: {len(page)} lines in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    n = min(args.baseline_lines, args.lines)
+    start = time.perf_counter()
+    nested_loop(log_clusters[:n], logs[:n], os.path.join(directory, "nested.txt"))
+    elapsed = time.perf_counter() - start
+    print(f"Nested loop: {n} lines in {elapsed:.2f}s ({n / elapsed:,.0f} lines/s; the cost grows with clusters x lines)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Run the budgeted Hyperband search over the default regressor grid on a large
+resampled copy of the synthetic metrics and compare it with the estimated cost of
+a naive grid search (every configuration fit once on all training rows).
+
+Run from the repository root:
+    python -m benchmarks.bench_hyperparameter_search --rows 500000 --time-budget 300
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from scripts import hyperparameter_search
+
+DATA_FILE = "./data/synthetic_cloudwatch_metrics.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--time-budget", type=float, default=300.0)
+    parser.add_argument("--method", choices=["hyperband", "halving"], default="hyperband")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.read_csv(DATA_FILE).drop(columns=["Timestamp"])
+    df = df.iloc[rng.integers(0, len(df), args.rows)]
+    X = df.drop(columns=["Error_Rate_Percentage"]).to_numpy()
+    X = X + rng.normal(scale=X.std(axis=0) * 0.01, size=X.shape)  # Break exact duplicates
+    y = df["Error_Rate_Percentage"].to_numpy()
+    n_train = int(len(X) * 0.8)
+
+    # Naive grid cost, extrapolated from the per-tree time of one full-size fit
+    space = hyperparameter_search.REGRESSOR_SPACE
+    start = time.perf_counter()
+    RandomForestRegressor(n_estimators=10, random_state=42).fit(X[:n_train], y[:n_train])
+    seconds_per_tree = (time.perf_counter() - start) / 10
+    n_configs = int(np.prod([len(values) for values in space.values()]))
+    total_trees = sum(space["n_estimators"]) * n_configs // len(space["n_estimators"])
+    print(f"Naive grid: {n_configs} configurations, {total_trees} full-size trees, "
+          f"~{seconds_per_tree * total_trees / 3600:.1f} CPU hours (upper bound: unrestricted depth)")
+
+    start = time.perf_counter()
+    model, results = hyperparameter_search.search_hyperparameters(
+        X, y, "regressor", method=args.method, time_budget=args.time_budget, n_jobs=args.n_jobs
+    )
+    elapsed = time.perf_counter() - start
+    print(results.head(10).to_string())
+    print(f"Search finished in {elapsed:.1f}s against a {args.time_budget:.0f}s budget; "
+          f"{len(results)} fits across rungs of {sorted(int(n) for n in results['n_rows'].unique())} rows")
+
+
+if __name__ == "__main__":
+    main()
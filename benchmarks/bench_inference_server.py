@@ -0,0 +1,113 @@
+"""
+Load generator for lambda_deploy/server.py. Starts the server with each
+micro-batching setting, keeps --concurrency keep-alive connections busy with a mix
+of anomaly detection, predictive maintenance and log clustering requests, and
+reports throughput, p50/p99 latency and the mean batch size the server formed.
+A max batch size of 1 serves every request on its own.
+
+Run from the repository root:
+    python -m benchmarks.bench_inference_server --concurrency 64 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_batch_events import synthetic_requests
+
+LAMBDA_DIR = os.path.join(os.path.dirname(__file__), "..", "lambda_deploy")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def call(reader, writer, method, path, event=None):
+    """
+    One HTTP request on a keep-alive connection; returns the decoded JSON response.
+    """
+    body = json.dumps(event).encode() if event is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    await reader.readline()  # Status line
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return json.loads(await reader.readexactly(length))
+
+
+async def client(port, requests, latencies, errors):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for request in requests:
+        start = time.perf_counter()
+        result = await call(reader, writer, "POST", "/", request)
+        latencies.append(time.perf_counter() - start)
+        errors.append("error" in result)
+    writer.close()
+
+
+async def generate_load(port, requests, concurrency):
+    """
+    Split requests over concurrency connections; returns latencies, elapsed seconds,
+    error count and the server's batching stats.
+    """
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests[i::concurrency], latencies, errors) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    stats = await call(reader, writer, "GET", "/stats")
+    writer.close()
+    return np.array(latencies), elapsed, sum(errors), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with np.load(os.path.join(LAMBDA_DIR, "anomaly_model.npz")) as arrays:
+        anomaly_features = int(arrays["n_features"])
+    with np.load(os.path.join(LAMBDA_DIR, "trained_model.npz")) as arrays:
+        regression_features = int(arrays["n_features"])
+    requests = synthetic_requests(args.requests, anomaly_features, regression_features, np.random.default_rng(0))
+
+    print(f"{args.requests} requests over {args.concurrency} connections, max wait {args.max_wait_ms} ms")
+    print(f"{'max batch':>10}{'requests/s':>12}{'p50 ms':>9}{'p99 ms':>9}{'mean batch':>12}{'errors':>8}")
+    for max_batch_size in args.batch_sizes:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-W", "ignore", "server.py", "--port", str(port),
+             "--max-batch-size", str(max_batch_size), "--max-wait-ms", str(args.max_wait_ms)],
+            cwd=LAMBDA_DIR, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            server.stdout.readline()  # "Serving ..." once the models are loaded
+            latencies, elapsed, errors, stats = asyncio.run(generate_load(port, requests, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+        batches = sum(route["batches"] for route in stats.values())
+        print(f"{max_batch_size:>10}{len(latencies) / elapsed:>12,.0f}{np.percentile(latencies, 50) * 1000:>9.2f}"
+              f"{np.percentile(latencies, 99) * 1000:>9.2f}{len(latencies) / max(batches, 1):>12.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
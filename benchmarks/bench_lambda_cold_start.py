@@ -0,0 +1,71 @@
+"""
+Measure Lambda cold starts per route: import (init phase) time, first-invocation
+time and peak resident memory in a fresh interpreter, with lazy per-route model
+loading against eager loading of every model (WARM_UP_MODELS=all, what the handler
+did at import before).
+
+Run from the repository root:
+    python -m benchmarks.bench_lambda_cold_start --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+LAMBDA_DIR = os.path.join(os.path.dirname(__file__), "..", "lambda_deploy")
+
+COLD_START = """
+import json, resource, time
+start = time.perf_counter()
+import lambda_function
+init = time.perf_counter() - start
+start = time.perf_counter()
+lambda_function.handler({event!r}, None)
+first = time.perf_counter() - start
+print(json.dumps({{"init": init, "first": first, "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def cold_start(event, warm_up, runs):
+    """
+    Median init time, first-call time (seconds) and peak RSS (MiB) over fresh interpreters.
+    """
+    env = dict(os.environ, WARM_UP_MODELS=warm_up)
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", COLD_START.format(event=event)],
+                                capture_output=True, text=True, check=True, cwd=LAMBDA_DIR, env=env)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return (float(np.median([r["init"] for r in results])), float(np.median([r["first"] for r in results])),
+            float(np.median([r["rss"] for r in results])) / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with np.load(os.path.join(LAMBDA_DIR, "anomaly_model.npz")) as arrays:
+        anomaly_features = int(arrays["n_features"])
+    with np.load(os.path.join(LAMBDA_DIR, "trained_model.npz")) as arrays:
+        regression_features = int(arrays["n_features"])
+    events = {
+        "anomaly_detection": {"type": "anomaly_detection", "data": [[0.5] * anomaly_features] * 10},
+        "predictive_maintenance": {"type": "predictive_maintenance", "features": [0.5] * regression_features},
+        "log_clustering": {"type": "log_clustering", "logs": ["Disk usage nearing capacity",
+                                                              "Network latency exceeded threshold"]},
+    }
+
+    print(f"{'route':<24}{'mode':<7}{'init ms':>9}{'first call ms':>15}{'total ms':>10}{'peak RSS MiB':>14}")
+    for route, event in events.items():
+        for mode, warm_up in (("lazy", ""), ("eager", "all")):
+            init, first, rss = cold_start(event, warm_up, args.runs)
+            print(f"{route:<24}{mode:<7}{init * 1000:>9.0f}{first * 1000:>15.1f}{(init + first) * 1000:>10.0f}"
+                  f"{rss:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
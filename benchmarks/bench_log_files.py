@@ -0,0 +1,66 @@
+"""
+Write a directory of synthetic per-instance hourly log files and run the parallel
+multi-file log analysis with 1 worker and with every core, reporting aggregate
+throughput and the speedup.
+
+Run from the repository root:
+    python -m benchmarks.bench_log_files --files 32 --lines-per-file 100000
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_log_templates import synthetic_logs, synthetic_templates
+from scripts import log_analysis
+
+LOG_LEVELS = ["INFO", "WARN", "ERROR", "DEBUG"]
+
+
+def write_log_files(directory, n_files, lines_per_file, n_templates, rng):
+    """
+    One file per instance-hour in the Generate_logs.py line format.
+    """
+    templates = synthetic_templates(n_templates, rng)
+    start = datetime.datetime(2024, 11, 20)
+    for file_index in range(n_files):
+        messages = synthetic_logs(lines_per_file, templates, rng)
+        levels = rng.integers(0, len(LOG_LEVELS), lines_per_file)
+        path = os.path.join(directory, f"i-{file_index:08x}-{start:%Y%m%d%H}.log")
+        with open(path, "w") as file:
+            file.write("".join(f"{start + datetime.timedelta(milliseconds=36 * i)} - {LOG_LEVELS[level]} - "
+                               f"{message}\n" for i, (level, message) in enumerate(zip(levels, messages))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--lines-per-file", type=int, default=100_000)
+    parser.add_argument("--templates", type=int, default=300)
+    parser.add_argument("--clusters", type=int, default=8)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    write_log_files(directory, args.files, args.lines_per_file, args.templates, np.random.default_rng(0))
+    model_dir = tempfile.mkdtemp()
+
+    timings = {}
+    for n_jobs in sorted({1, os.cpu_count()}):
+        print(f"\n--- {n_jobs} worker(s) ---")
+        start = time.perf_counter()
+        _, file_stats, templates = log_analysis.analyze_log_files(directory, num_clusters=args.clusters,
+                                                                  n_jobs=n_jobs, model_dir=model_dir)
+        timings[n_jobs] = time.perf_counter() - start
+    total_lines = args.files * args.lines_per_file
+    print()
+    for n_jobs, seconds in timings.items():
+        print(f"{n_jobs} worker(s): {seconds:.2f}s end to end, {total_lines / seconds:,.0f} lines/s, "
+              f"speedup {timings[1] / seconds:.2f}x")
+    print(f"{len(templates)} merged templates; largest:\n{templates.head(5).to_string()}")
+
+
+if __name__ == "__main__":
+    main()
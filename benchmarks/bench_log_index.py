@@ -0,0 +1,66 @@
+"""
+Write a large log file in the Generate_logs.py format, build its sparse timestamp
+index and time one-minute range queries (with and without a level filter) against
+a full scan with stream_logs.
+
+Run from the repository root:
+    python -m benchmarks.bench_log_index --lines 20000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_log_parsing import write_log_file
+from scripts.log_analysis import stream_logs
+from scripts.log_index import LogStore, build_log_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20_000_000)
+    parser.add_argument("--every", type=int, default=1024, help="lines between index entries")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--skip-scan", action="store_true", help="skip the full-scan baseline")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "synthetic_cloudwatch_logs.log")
+    write_log_file(path, args.lines, np.random.default_rng(0))  # One line every 100 ms from 2024-11-20
+    size = os.path.getsize(path)
+    print(f"Log file: {args.lines} lines, {size / 2 ** 30:.2f} GiB")
+
+    start = time.perf_counter()
+    index = build_log_index(path, every=args.every)
+    elapsed = time.perf_counter() - start
+    print(f"Index: {len(index['offsets'])} entries, {os.path.getsize(path + '.idx.npz') / 1024:.0f} KiB, "
+          f"built in {elapsed:.2f}s ({size / 2 ** 20 / elapsed:.0f} MiB/s)")
+
+    rng = np.random.default_rng(1)
+    first = np.datetime64("2024-11-20T00:00:00", "us")
+    span_minutes = args.lines // 600
+    windows = [first + np.timedelta64(int(minute), "m") for minute in rng.integers(0, span_minutes, args.queries)]
+    with LogStore(path, every=args.every) as store:
+        for levels in (None, ["ERROR"]):
+            latencies = []
+            for window_start in windows:
+                query_start = time.perf_counter()
+                result = store.query(window_start, window_start + np.timedelta64(1, "m"), levels=levels)
+                latencies.append(time.perf_counter() - query_start)
+            latencies = np.array(latencies) * 1000
+            print(f"One-minute queries (levels={levels}): {len(result['message'])} lines in the last one, "
+                  f"median {np.median(latencies):.2f} ms, p99 {np.percentile(latencies, 99):.2f} ms")
+
+    if not args.skip_scan:
+        window_start = windows[0]
+        window_end = window_start + np.timedelta64(1, "m")
+        start = time.perf_counter()
+        matched = 0
+        for batch in stream_logs(path):
+            matched += int(((batch["timestamp"] >= window_start) & (batch["timestamp"] < window_end)).sum())
+        print(f"Full scan for one window: {matched} lines in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
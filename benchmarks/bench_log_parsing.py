@@ -0,0 +1,97 @@
+"""
+Write a large synthetic CloudWatch log file and measure the streaming log parser:
+throughput in lines/s and peak Python memory, against readlines() plus a per-line
+re.sub as preprocess_logs used to do.
+
+Run from the repository root:
+    python -m benchmarks.bench_log_parsing --lines 2000000
+"""
+import argparse
+import datetime
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from scripts.log_analysis import stream_logs
+
+LOG_LEVELS = ["INFO", "WARN", "ERROR", "DEBUG"]
+LOG_MESSAGES = [
+    "Application started successfully",
+    "Database connection established",
+    "Disk usage nearing capacity",
+    "Unexpected error occurred in module X",
+    "High memory usage detected",
+    "Network latency exceeded threshold",
+    "Auto-scaling triggered new instance launch",
+]
+
+
+def write_log_file(path, n_lines, rng, chunk=100_000):
+    """
+    Write n_lines in the Generate_logs.py format, one chunk at a time.
+    """
+    start = datetime.datetime(2024, 11, 20)
+    with open(path, "w") as file:
+        for offset in range(0, n_lines, chunk):
+            count = min(chunk, n_lines - offset)
+            levels = rng.integers(0, len(LOG_LEVELS), count)
+            messages = rng.integers(0, len(LOG_MESSAGES), count)
+            file.write("".join(
+                f"{start + datetime.timedelta(milliseconds=100 * (offset + i))} - "
+                f"{LOG_LEVELS[levels[i]]} - {LOG_MESSAGES[messages[i]]}\n"
+                for i in range(count)
+            ))
+
+
+def readlines_baseline(path):
+    with open(path, "r") as file:
+        logs = file.readlines()
+    return [re.sub(r"\d{4}-\d{2}-\d{2}.*- ", "", log.strip()) for log in logs]
+
+
+def streaming(path, batch_size):
+    n_lines = 0
+    for batch in stream_logs(path, batch_size=batch_size):
+        n_lines += len(batch["message"])
+    return n_lines
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    # Peak memory in a second, traced run (tracing slows it down)
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--skip-baseline", action="store_true", help="only measure the streaming parser")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "synthetic_cloudwatch_logs.log")
+    write_log_file(path, args.lines, np.random.default_rng(0))
+    print(f"Log file: {args.lines} lines, {os.path.getsize(path) / 2 ** 20:.0f} MiB")
+
+    n_lines, elapsed, peak = measure(streaming, path, args.batch_size)
+    print(f"Streaming parser: {n_lines / elapsed:,.0f} lines/s ({elapsed:.2f}s), "
+          f"peak memory {peak / 2 ** 20:.1f} MiB")
+    if not args.skip_baseline:
+        logs, elapsed, peak = measure(readlines_baseline, path)
+        print(f"readlines + re.sub: {len(logs) / elapsed:,.0f} lines/s ({elapsed:.2f}s), "
+              f"peak memory {peak / 2 ** 20:.1f} MiB")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Generate log lines from a few hundred templates with variable fields (IPs, ids,
+durations), then compare categorize_logs on every line against clustering the mined
+templates weighted by count: time, number of documents clustered, agreement of the
+cluster assignments, and the speed of assigning new lines with TemplateMiner.match.
+
+Run from the repository root:
+    python -m benchmarks.bench_log_templates --lines 1000000 --templates 300
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from scripts import log_analysis
+
+WORDS = ["connection", "instance", "request", "timeout", "disk", "memory", "volume", "latency", "scaling",
+         "database", "snapshot", "health", "check", "queue", "worker", "cache", "session", "token", "backup",
+         "replica", "failed", "completed", "started", "exceeded", "detected", "restarted", "throttled"]
+FIELDS = [
+    lambda rng: f"10.{rng.integers(256)}.{rng.integers(256)}.{rng.integers(256)}",
+    lambda rng: f"i-{rng.integers(16 ** 8):08x}",
+    lambda rng: str(rng.integers(1, 100_000)),
+    lambda rng: f"{rng.uniform(0, 5000):.1f}",
+]
+
+
+def synthetic_templates(n_templates, rng):
+    """
+    Random templates of 4-9 slots, each a fixed word or (30%) a variable field.
+    """
+    templates = []
+    for _ in range(n_templates):
+        length = rng.integers(4, 10)
+        slots = rng.random(length) < 0.3
+        slots[0] = False
+        templates.append([("field", rng.integers(len(FIELDS))) if slot else ("word", WORDS[rng.integers(len(WORDS))])
+                          for slot in slots])
+    return templates
+
+
+def synthetic_logs(n_lines, templates, rng):
+    """
+    Log messages drawn from templates with skewed frequencies, as in production logs,
+    with the variable fields filled in per line.
+    """
+    weights = 1 / np.arange(1, len(templates) + 1)
+    choices = rng.choice(len(templates), n_lines, p=weights / weights.sum())
+    return [" ".join(FIELDS[value](rng) if kind == "field" else value for kind, value in templates[choice])
+            for choice in choices]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--templates", type=int, default=300)
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--full-lines", type=int, default=100_000, help="lines for the per-line clustering baseline")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    templates = synthetic_templates(args.templates, rng)
+    logs = synthetic_logs(args.lines, templates, rng)
+    # categorize_logs saves its models under ./models; keep them out of the repository
+    os.chdir(tempfile.mkdtemp())
+
+    start = time.perf_counter()
+    template_clusters, _ = log_analysis.categorize_logs(logs, num_clusters=args.clusters)
+    template_seconds = time.perf_counter() - start
+    print(f"Templates: {args.lines} lines clustered in {template_seconds:.2f}s "
+          f"({args.lines / template_seconds:,.0f} lines/s)")
+
+    subset = logs[:args.full_lines]
+    start = time.perf_counter()
+    full_clusters, _ = log_analysis.categorize_logs(subset, num_clusters=args.clusters, use_templates=False)
+    full_seconds = time.perf_counter() - start
+    print(f"Per line: {len(subset)} lines clustered in {full_seconds:.2f}s ({len(subset) / full_seconds:,.0f} lines/s)")
+    subset_templates, _ = log_analysis.categorize_logs(subset, num_clusters=args.clusters)
+    print(f"Adjusted Rand index, templates vs per line on the same {len(subset)} lines: "
+          f"{adjusted_rand_score(full_clusters, subset_templates):.3f}")
+
+    # Assigning new lines: one tree lookup each
+    miner = joblib.load("./models/log_template_miner.pkl")
+    new_logs = synthetic_logs(100_000, templates, rng)
+    start = time.perf_counter()
+    ids = miner.match_many(new_logs)
+    match_seconds = time.perf_counter() - start
+    print(f"Matching {len(new_logs)} new lines: {len(new_logs) / match_seconds:,.0f} lines/s, "
+          f"{(ids >= 0).mean():.1%} matched an existing template")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Train a large random forest regressor, save it as a joblib pickle, as the
+compressed array export and as a memory-mapped model store, then start several
+worker processes at once that each load the model and predict a batch. Reports the
+median load time, resident memory per worker and the proportional set size (PSS)
+summed over all workers, which counts pages shared between them only once.
+
+Run from the repository root:
+    python -m benchmarks.bench_model_store --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from scripts.array_forest import export_random_forest
+from scripts.model_store import save_model
+
+REPOSITORY_ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+WORKER = """
+import json, sys, time
+import numpy as np
+import joblib, sklearn.ensemble  # Same imports in every mode, so only the model differs
+from scripts.array_forest import ArrayRandomForest
+from scripts.model_store import load_model
+
+start = time.perf_counter()
+if {mode!r} == "joblib":
+    model = joblib.load({path!r})
+elif {mode!r} == "npz":
+    model = ArrayRandomForest.load({path!r})
+elif {mode!r} == "store":
+    model = load_model({path!r})
+load = time.perf_counter() - start
+prediction = model.predict(np.load({queries!r})) if {mode!r} != "none" else np.zeros(1)
+print(json.dumps({{"load": load, "checksum": float(prediction.sum())}}), flush=True)
+sys.stdin.read()  # Stay alive until every worker has been measured
+"""
+
+
+def memory_mib(pid):
+    """
+    Rss and Pss of a process in MiB, from /proc/<pid>/smaps_rollup.
+    """
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def run_workers(mode, path, queries, n_workers):
+    """
+    Start n_workers loaders together; returns load times, checksums, RSS and PSS per worker.
+    """
+    workers = [subprocess.Popen([sys.executable, "-W", "ignore", "-c", WORKER.format(mode=mode, path=path,
+                                                                                     queries=queries)],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=REPOSITORY_ROOT)
+               for _ in range(n_workers)]
+    reports = [json.loads(worker.stdout.readline()) for worker in workers]
+    memory = [memory_mib(worker.pid) for worker in workers]
+    for worker in workers:
+        worker.communicate("")
+    return ([report["load"] for report in reports], [report["checksum"] for report in reports],
+            [rss for rss, _ in memory], [pss for _, pss in memory])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, (args.rows, 8)).astype(np.float32)
+    y = np.sin(X[:, 0] / 10) * X[:, 1] + rng.normal(0, 5, args.rows)
+    model = RandomForestRegressor(n_estimators=args.trees, max_depth=15, n_jobs=-1, random_state=42).fit(X, y)
+
+    tmp_dir = tempfile.mkdtemp()
+    paths = {
+        "joblib": os.path.join(tmp_dir, "trained_model.pkl"),
+        "npz": os.path.join(tmp_dir, "trained_model.npz"),
+        "store": os.path.join(tmp_dir, "trained_model.store"),
+    }
+    joblib.dump(model, paths["joblib"])
+    save_model(export_random_forest(model, paths["npz"]), paths["store"])
+    queries = os.path.join(tmp_dir, "queries.npy")
+    np.save(queries, X[rng.choice(args.rows, args.queries)])
+
+    print(f"\n{args.workers} workers each loading the model and predicting {args.queries} rows")
+    print(f"{'format':<8}{'load ms':>9}{'RSS MiB/worker':>16}{'PSS MiB total':>15}")
+    checksums = {}
+    for mode in ("none", "joblib", "npz", "store"):
+        loads, checksums[mode], rss, pss = run_workers(mode, paths.get(mode), queries, args.workers)
+        print(f"{mode:<8}{np.median(loads) * 1000:>9.1f}{np.mean(rss):>16.1f}{np.sum(pss):>15.1f}")
+    print("\n'none' only imports the modules; subtract it to get the model's own share.")
+    print(f"Array export and store predictions identical: {checksums['npz'] == checksums['store']}")
+
+
+if __name__ == "__main__":
+    main()
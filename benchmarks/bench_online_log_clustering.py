@@ -0,0 +1,56 @@
+"""
+Stream synthetic log batches through the online log clustering (hashing vectorizer
++ mini-batch KMeans) and report throughput and peak memory as the number of lines
+seen grows; both should stay flat.
+
+Run from the repository root:
+    python -m benchmarks.bench_online_log_clustering --lines 5000000 --batch-size 65536
+"""
+import argparse
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_log_templates import synthetic_logs, synthetic_templates
+from scripts import log_analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5_000_000)
+    parser.add_argument("--batch-size", type=int, default=65536)
+    parser.add_argument("--templates", type=int, default=300)
+    parser.add_argument("--clusters", type=int, default=8)
+    parser.add_argument("--checkpoint-every", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    templates = synthetic_templates(args.templates, rng)
+    # Pre-generate a handful of batches and replay them, so generating lines is not timed
+    batches = [synthetic_logs(args.batch_size, templates, rng) for _ in range(4)]
+    n_batches = -(-args.lines // args.batch_size)
+    report_every = max(1, n_batches // 5)
+    state = {"start": time.perf_counter(), "lines": 0}
+
+    def replay():
+        for i in range(n_batches):
+            yield batches[i % len(batches)]
+            state["lines"] += args.batch_size
+            if (i + 1) % report_every == 0:
+                elapsed = time.perf_counter() - state["start"]
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                print(f"  {state['lines']:>10} lines: {state['lines'] / elapsed:,.0f} lines/s so far, "
+                      f"peak RSS {peak:.0f} MiB")
+
+    _, counts = log_analysis.categorize_logs_online(replay(), num_clusters=args.clusters,
+                                                    checkpoint_every=args.checkpoint_every,
+                                                    model_dir=tempfile.mkdtemp(), resume=False)
+    elapsed = time.perf_counter() - state["start"]
+    print(f"Clustered {counts.sum()} lines online in {elapsed:.1f}s ({counts.sum() / elapsed:,.0f} lines/s); "
+          f"cluster sizes {counts.tolist()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measure how per-instance preprocessing + Isolation Forest training scales with
+the number of worker processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_partitioned_training --instances 64 --rows 2000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.partitioned_training import predict_anomalies_per_instance, train_per_instance_models
+
+
+def make_data(n_instances, rows_per_instance, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_instances * rows_per_instance
+    instance = np.repeat([f"i-{k:08x}" for k in range(n_instances)], rows_per_instance)
+    baseline = np.repeat(rng.uniform(30, 70, n_instances), rows_per_instance)
+    return pd.DataFrame({
+        "Timestamp": np.tile(pd.date_range("2024-11-20", periods=rows_per_instance, freq="min"), n_instances),
+        "InstanceId": instance,
+        "CPU_Utilization": rng.normal(baseline, 15),
+        "Memory_Usage_MB": rng.uniform(1024, 4096, n),
+        "Disk_IO_MBps": rng.uniform(5, 200, n),
+        "Network_In_Mbps": rng.uniform(10, 1000, n),
+        "Network_Out_Mbps": rng.uniform(10, 1000, n),
+        "Error_Rate_Percentage": rng.uniform(0, 5, n),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=2000, help="rows per instance")
+    parser.add_argument("--jobs", type=int, nargs="*", help="worker counts to try (default: 1, 2, 4, ... cpu_count)")
+    args = parser.parse_args()
+
+    df = make_data(args.instances, args.rows)
+    cpu_count = os.cpu_count()
+    jobs = args.jobs or sorted({1, cpu_count} | {2 ** k for k in range(1, 8) if 2 ** k < cpu_count})
+    print(f"Data: {args.instances} instances x {args.rows} rows, {cpu_count} CPUs")
+
+    baseline = None
+    for n_jobs in jobs:
+        start = time.perf_counter()
+        bundle = train_per_instance_models(df, bundle_path=None, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"n_jobs={n_jobs:>3}: {elapsed:7.2f}s  speedup {baseline / elapsed:5.2f}x  "
+              f"({len(df) / elapsed:,.0f} rows/s)")
+
+    predictions = predict_anomalies_per_instance(df, bundle)
+    print(f"Anomalies flagged across instances: {(predictions == -1).sum()} of {len(df)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measure the compact float32 export of the predictive maintenance random forest
+against the joblib pickle: accuracy delta, artifact size, cold-start load time and
+batch / single-row prediction speed, with and without tree pruning.
+
+Run from the repository root:
+    python -m benchmarks.bench_random_forest_export --rows 10000 --prune-tolerance 0.02
+"""
+import argparse
+import os
+import tempfile
+
+import joblib
+import numpy as np
+
+from benchmarks.bench_array_forest import cold_load_seconds, timed
+from scripts.array_forest import ArrayRandomForest, export_random_forest
+
+MODEL_FILE = "./models/trained_model.pkl"
+
+LOAD_ARRAYS = """
+import time
+start = time.perf_counter()
+from array_forest import ArrayRandomForest
+model = ArrayRandomForest.load({path!r})
+print(time.perf_counter() - start)
+"""
+
+LOAD_PICKLE = """
+import time
+start = time.perf_counter()
+import joblib
+model = joblib.load({path!r})
+print(time.perf_counter() - start)
+"""
+
+
+def report(name, model, forest, path, X_test):
+    expected = model.predict(X_test)
+    predicted = forest.predict(X_test)
+    error = predicted - expected
+    print(f"{name}: {forest.n_trees} trees, {os.path.getsize(path) / 1024:.0f} KiB, "
+          f"max |delta| {np.abs(error).max():.2e}, RMSE {np.sqrt((error ** 2).mean()):.2e} "
+          f"(target std {expected.std():.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="test rows to predict")
+    parser.add_argument("--prune-tolerance", type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_FILE)
+    rng = np.random.default_rng(0)
+    # The committed model was trained on standardized PCA components
+    X_test = rng.normal(0, 1, (args.rows, model.n_features_in_))
+
+    tmp_dir = tempfile.mkdtemp()
+    array_path = os.path.join(tmp_dir, "trained_model.npz")
+    pruned_path = os.path.join(tmp_dir, "trained_model_pruned.npz")
+    export_random_forest(model, array_path)
+    export_random_forest(model, pruned_path, X_reference=X_test[:2000], prune_tolerance=args.prune_tolerance)
+    forest = ArrayRandomForest.load(array_path)
+    pruned = ArrayRandomForest.load(pruned_path)
+
+    print(f"Pickle: {len(model.estimators_)} trees, {os.path.getsize(MODEL_FILE) / 1024:.0f} KiB")
+    report("Arrays", model, forest, array_path, X_test)
+    report("Pruned", model, pruned, pruned_path, X_test)
+
+    _, sk_time = timed(model.predict, X_test)
+    _, array_time = timed(forest.predict, X_test)
+    _, pruned_time = timed(pruned.predict, X_test)
+    print(f"Predicting {args.rows} rows: sklearn {sk_time * 1000:.1f} ms, arrays {array_time * 1000:.1f} ms, "
+          f"pruned {pruned_time * 1000:.1f} ms")
+    _, sk_single = timed(model.predict, X_test[:1], repeat=50)
+    _, array_single = timed(forest.predict, X_test[:1], repeat=50)
+    print(f"Predicting 1 row: sklearn {sk_single * 1000:.2f} ms, arrays {array_single * 1000:.2f} ms")
+
+    _, array_load = timed(ArrayRandomForest.load, array_path, repeat=20)
+    _, pickle_load = timed(joblib.load, MODEL_FILE, repeat=20)
+    print(f"Artifact load (warm interpreter): pickle {pickle_load * 1000:.2f} ms, arrays {array_load * 1000:.2f} ms")
+    print(f"Cold load (imports + artifact): "
+          f"pickle {cold_load_seconds(LOAD_PICKLE.format(path=os.path.abspath(MODEL_FILE))) * 1000:.0f} ms, "
+          f"arrays {cold_load_seconds(LOAD_ARRAYS.format(path=array_path)) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
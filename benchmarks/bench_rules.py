@@ -0,0 +1,80 @@
+"""
+Evaluate thousands of generated threshold / rate / N-of-M rules over millions of
+synthetic metric rows with CompiledRules and report throughput.
+
+Rules are drawn from --shapes distinct (metric, kind, window) combinations with
+random thresholds, the way severity tiers and per-team alerts share a shape;
+pass --shapes equal to --rules for the worst case where no two rules share one.
+
+Run from the repository root:
+    python -m benchmarks.bench_rules --rows 2000000 --rules 2000 --shapes 100
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.rules import CompiledRules
+
+DATA_FILE = "./data/synthetic_cloudwatch_metrics.csv"
+
+
+def generate_rules(df, n_rules, n_shapes, rng):
+    metrics = [column for column in df.columns if column != "Timestamp"]
+    shapes = []
+    for _ in range(n_shapes):
+        metric = metrics[rng.integers(len(metrics))]
+        kind = ["threshold", "deviation", "rate"][rng.integers(3)]
+        m = int(rng.choice([1, 3, 5, 10]))
+        shape = {"metric": metric, "kind": kind, "op": [">", ">=", "<", "<="][rng.integers(4)],
+                 "m": m, "n": int(rng.integers(1, m + 1))}
+        if kind == "deviation":
+            shape["center"] = float(df[metric].mean())
+        elif kind == "rate":
+            shape["periods"] = int(rng.choice([1, 5, 15]))
+        shapes.append(shape)
+
+    rules = []
+    for i in range(n_rules):
+        shape = shapes[rng.integers(n_shapes)]
+        values = df[shape["metric"]]
+        if shape["kind"] == "threshold":
+            value = float(values.quantile(rng.random()))
+        else:
+            value = float(values.std() * rng.random() * 2)
+        rules.append(dict(shape, name=f"rule_{i}", value=value))
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--rules", type=int, default=2000)
+    parser.add_argument("--shapes", type=int, default=100)
+    parser.add_argument("--chunk-rows", type=int, default=65536)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.read_csv(DATA_FILE)
+    rules = generate_rules(df, args.rules, min(args.shapes, args.rules), rng)
+    # Resample the recorded metrics up to the requested size
+    data = {column: df[column].to_numpy()[rng.integers(0, len(df), args.rows)]
+            for column in df.columns if column != "Timestamp"}
+
+    start = time.perf_counter()
+    compiled = CompiledRules(rules, chunk_rows=args.chunk_rows)
+    compile_seconds = time.perf_counter() - start
+    print(f"Compiled {len(rules)} rules into {len(compiled.groups)} groups over "
+          f"{len(compiled.series)} derived series in {compile_seconds * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    results = compiled.evaluate(data)
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(rules)} rules over {args.rows} rows in {elapsed:.2f}s "
+          f"({len(rules) * args.rows / elapsed / 1e6:.0f}M rule-rows/s)")
+    print(f"Rows with at least one rule firing: {results['anomaly'].sum()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,228 @@
-import pickle
-import json
+import os
 
-# Load models
-with open("anomaly_model.pkl", "rb") as f:
-    anomaly_model = pickle.load(f)
+import numpy as np
 
-with open("trained_model.pkl", "rb") as f:
-    predictive_model = pickle.load(f)
+from array_forest import ArrayIsolationForest, ArrayRandomForest
+from cluster_cache import ClusterAssignmentCache
+from log_templates import VARIABLE_PATTERN
+from model_store import load_model
+from pipeline import PreprocessingPipeline
 
-with open("log_clustering_model.pkl", "rb") as f:
-    clustering_model = pickle.load(f)
 
-with open("tfidf_vectorizer.pkl", "rb") as f:
-    tfidf_vectorizer = pickle.load(f)
+# Models are loaded on first use by the route that needs them and kept for warm
+# invocations, so a cold start only pays for its own route. joblib (and with it
+# scikit-learn) is only imported when a pickle has to be loaded.
+def load_artifact(name):
+    # A model store maps its arrays instead of copying them, so concurrent execution
+    # environments on a host share the pages; fall back to the joblib pickle
+    if os.path.isdir(name + ".store"):
+        return load_model(name + ".store")
+    import joblib
+    return joblib.load(name + ".pkl")
+
+
+def load_anomaly_model():
+    # The array export of the Isolation Forest loads in milliseconds and needs only NumPy;
+    # its model store, when bundled, is mapped rather than read
+    if os.path.exists("anomaly_model.npz") and not os.path.isdir("anomaly_model.store"):
+        return ArrayIsolationForest.load("anomaly_model.npz")
+    return load_artifact("anomaly_model")
+
+
+def load_predictive_model():
+    # Same for the regressor: float32 flat arrays, a fraction of the pickle's size
+    if os.path.exists("trained_model.npz") and not os.path.isdir("trained_model.store"):
+        return ArrayRandomForest.load("trained_model.npz")
+    return load_artifact("trained_model")
+
+
+def load_log_clustering():
+    # Online log clustering checkpoints (hashing vectorizer + mini-batch KMeans) take
+    # precedence over the batch TF-IDF + KMeans models; both expose transform/predict
+    if os.path.exists("log_online_clustering_model.pkl") or os.path.isdir("log_online_clustering_model.store"):
+        clustering_model = load_artifact("log_online_clustering_model")
+        log_vectorizer = load_artifact("log_hashing_vectorizer")
+    else:
+        clustering_model = load_artifact("log_clustering_model")
+        log_vectorizer = load_artifact("tfidf_vectorizer")
+    # Message -> cluster memo, kept across warm invocations; repeated messages skip the vectorizer
+    return ClusterAssignmentCache(
+        log_vectorizer, clustering_model, max_bytes=int(os.environ.get("LOG_CLUSTER_CACHE_BYTES", 8 * 1024 * 1024)),
+        mask_pattern=VARIABLE_PATTERN,
+    )
+
+
+def load_preprocessing_pipeline():
+    # Fitted preprocessing transform, so callers can send raw metrics with "raw": true
+    if not os.path.exists("preprocessing_pipeline.npz"):
+        raise ValueError("Raw metrics require preprocessing_pipeline.npz in the deployment package")
+    return PreprocessingPipeline.load("preprocessing_pipeline.npz")
+
+
+MODEL_LOADERS = {
+    "anomaly_detection": load_anomaly_model,
+    "predictive_maintenance": load_predictive_model,
+    "log_clustering": load_log_clustering,
+    "preprocessing": load_preprocessing_pipeline,
+}
+models = {}
+
+
+def get_model(name):
+    """
+    Return a model from the registry, loading it on first use.
+    """
+    model = models.get(name)
+    if model is None:
+        model = models[name] = MODEL_LOADERS[name]()
+    return model
+
+
+def warm_up(names):
+    """
+    Preload models, e.g. the routes a function mostly serves. names is a list or a
+    comma-separated string of MODEL_LOADERS keys, or "all" (every route, plus the
+    preprocessing pipeline when it is deployed). Unknown names are reported and
+    skipped, so a typo in WARM_UP_MODELS cannot break the init phase.
+    """
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(",")]
+    if names == ["all"]:
+        names = [name for name in MODEL_LOADERS
+                 if name != "preprocessing" or os.path.exists("preprocessing_pipeline.npz")]
+    for name in names:
+        if name in MODEL_LOADERS:
+            get_model(name)
+        elif name:
+            print(f"Skipping unknown model {name!r} in warm-up; expected one of {sorted(MODEL_LOADERS)} or 'all'")
+    return sorted(models)
+
+
+# Optional warm-up during the init phase, e.g. WARM_UP_MODELS=anomaly_detection,preprocessing
+warm_up(os.environ.get("WARM_UP_MODELS", ""))
+
+
+def prepare_features(event, data):
+    """
+    Apply the training-time preprocessing to raw metric rows when the event asks for it.
+    """
+    if not event.get("raw"):
+        return data
+    return get_model("preprocessing").transform(data)
+
+
+def _metric_rows(rows):
+    rows = np.asarray(rows, dtype=np.float64)
+    if rows.ndim != 2:
+        raise ValueError(f"Expected a list of metric rows, got an array of shape {rows.shape}")
+    return rows
+
+
+def _anomaly_items(request):
+    return _metric_rows(request.get("data", []))
+
+
+def _predictive_items(request):
+    return _metric_rows([request.get("features", [])])
+
+
+def _log_items(request):
+    logs = request.get("logs", [])
+    if not isinstance(logs, list) or not all(isinstance(log, str) for log in logs):
+        raise ValueError("Expected a list of log messages")
+    return logs
+
+
+def _predict_anomalies(rows, raw):
+    return get_model("anomaly_detection").predict(prepare_features({"raw": raw}, rows))
+
+
+def _predict_maintenance(rows, raw):
+    return get_model("predictive_maintenance").predict(prepare_features({"raw": raw}, rows))
+
+
+def _predict_log_clusters(logs, raw):
+    return get_model("log_clustering").predict(logs)
+
+
+# Per request type in a batch: read one request's items, predict all items of the
+# type at once, and the result key of one request
+BATCH_ROUTES = {
+    "anomaly_detection": (_anomaly_items, _predict_anomalies, "predictions"),
+    "predictive_maintenance": (_predictive_items, _predict_maintenance, "maintenance_prediction"),
+    "log_clustering": (_log_items, _predict_log_clusters, "log_clusters"),
+}
+
+
+def handle_batch(requests):
+    """
+    Serve a list of requests of any types with one vectorized predict call per
+    (type, raw) group. Results come back in request order; a request that cannot
+    be read or predicted gets {"error": ...} without failing the others.
+    """
+    results = [None] * len(requests)
+    groups = {}
+    for position, request in enumerate(requests):
+        if not isinstance(request, dict) or request.get("type") not in BATCH_ROUTES:
+            results[position] = {"error": "Invalid event type"}
+            continue
+        groups.setdefault((request["type"], bool(request.get("raw"))), []).append(position)
+
+    for (route, raw), positions in groups.items():
+        read_items, predict, result_key = BATCH_ROUTES[route]
+        items = []
+        for position in positions:
+            try:
+                items.append((position, read_items(requests[position])))
+            except (TypeError, ValueError) as error:
+                results[position] = {"error": str(error)}
+        if not items:
+            continue
+        try:
+            if route == "log_clustering":
+                outputs = predict([log for _, logs in items for log in logs], raw)
+            else:
+                outputs = predict(np.concatenate([rows for _, rows in items]), raw)
+            ends = np.cumsum([len(item) for _, item in items])
+            starts = np.concatenate([[0], ends[:-1]])
+            for (position, _), start, end in zip(items, starts, ends):
+                results[position] = {result_key: outputs[start:end].tolist()}
+        except Exception:
+            # Something in the group is malformed (e.g. a wrong column count): isolate it
+            for position, item in items:
+                try:
+                    results[position] = {result_key: predict(item, raw).tolist()}
+                except Exception as error:
+                    results[position] = {"error": str(error)}
+    return {"results": results}
 
 
 def handler(event, context):
     # Example: Anomaly Detection
     if event.get("type") == "anomaly_detection":
-        data = event.get("data", [])
-        predictions = anomaly_model.predict(data)
+        data = prepare_features(event, event.get("data", []))
+        predictions = get_model("anomaly_detection").predict(data)
         return {"predictions": predictions.tolist()}
 
     # Example: Predictive Maintenance
     elif event.get("type") == "predictive_maintenance":
-        features = event.get("features", [])
-        prediction = predictive_model.predict([features])
+        features = prepare_features(event, [event.get("features", [])])
+        prediction = get_model("predictive_maintenance").predict(features)
         return {"maintenance_prediction": prediction.tolist()}
 
     # Example: Log Clustering
     elif event.get("type") == "log_clustering":
         logs = event.get("logs", [])
-        transformed_logs = tfidf_vectorizer.transform(logs)
-        clusters = clustering_model.predict(transformed_logs)
-        return {"log_clusters": clusters.tolist()}
+        log_cluster_cache = get_model("log_clustering")
+        clusters = log_cluster_cache.predict(logs)
+        return {"log_clusters": clusters.tolist(), "cache": log_cluster_cache.stats()}
+
+    # Many requests of any types in one invocation: {"type": "batch", "requests": [...]}
+    elif event.get("type") == "batch":
+        return handle_batch(event.get("requests", []))
+
+    # Scheduled pings can preload models ahead of traffic
+    elif event.get("type") == "warm_up":
+        return {"loaded": warm_up(event.get("models", "all"))}
 
     return {"error": "Invalid event type"}
\ No newline at end of file
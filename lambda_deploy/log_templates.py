@@ -0,0 +1,166 @@
+import re
+
+import numpy as np
+
+# Variable fields replaced by the wildcard before tokenizing, when they make up a whole
+# token (or a key=value value): IPv4 with optional port, AWS resource ids (i-0abc...,
+# vol-..., sg-...), UUIDs, hex literals and numbers with an optional unit. The
+# lookahead for a digit or hyphen rejects most plain words before trying the alternatives.
+VARIABLE_PATTERN = re.compile(
+    r"(?<![^\s=(\[,])(?=[^\s,;)\]]*[\d-])(?:"
+    r"(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?"
+    r"|[a-z]+-[0-9a-f]{8,17}"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|0x[0-9a-fA-F]+"
+    r"|-?\d+(?:\.\d+)?(?:%|ms|s|[KMG]i?B)?"
+    r")(?![^\s,;.)\]])"
+)
+WILDCARD = "<*>"
+
+
+class TemplateMiner:
+    """
+    Drain-style online log template miner.
+
+    Lines are masked (VARIABLE_PATTERN -> <*>), split on whitespace and routed
+    through a fixed-depth prefix tree: first by token count, then by their first
+    depth - 2 tokens (tokens containing digits, and new tokens once a node has
+    max_children, go to the <*> branch). The leaf holds a few candidate templates;
+    the line joins the most similar one (share of positions with the same token) if the
+    similarity reaches similarity_threshold, turning the positions that differ into
+    <*>, or starts a new template otherwise. Template ids are stable, so ids handed
+    out earlier stay valid as templates generalize. Identical masked lines skip the
+    tree through a cache of up to max_cache entries.
+    """
+
+    def __init__(self, depth=4, similarity_threshold=0.4, max_children=100, mask_pattern=VARIABLE_PATTERN,
+                 max_cache=100_000):
+        if depth < 3:
+            raise ValueError("depth must be at least 3 (root, token count and one token level)")
+        self.depth = depth
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.mask_pattern = mask_pattern
+        self.max_cache = max_cache
+        self._root = {}
+        self._templates = []  # token lists, indexed by template id
+        self._counts = []
+        self._cache = {}
+
+    @property
+    def templates(self):
+        """
+        Template strings, indexed by template id.
+        """
+        return [" ".join(tokens) for tokens in self._templates]
+
+    @property
+    def counts(self):
+        """
+        Number of lines added to each template.
+        """
+        return np.array(self._counts, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._templates)
+
+    def add(self, message):
+        """
+        Add one log line, updating the templates. Returns its template id.
+        """
+        masked = self.mask_pattern.sub(WILDCARD, message)
+        template_id = self._cache.get(masked)
+        if template_id is None:
+            tokens = masked.split()
+            leaf = self._leaf(tokens, create=True)
+            template_id = self._best_match(leaf, tokens)
+            if template_id is None:
+                template_id = len(self._templates)
+                self._templates.append(tokens)
+                self._counts.append(0)
+                leaf.append(template_id)
+            else:
+                template = self._templates[template_id]
+                if any(token != old and old != WILDCARD for token, old in zip(tokens, template)):
+                    self._templates[template_id] = [old if token == old else WILDCARD
+                                                    for token, old in zip(tokens, template)]
+            if len(self._cache) >= self.max_cache:
+                self._cache.clear()
+            self._cache[masked] = template_id
+        self._counts[template_id] += 1
+        return template_id
+
+    def add_many(self, messages):
+        """
+        Add a sequence of log lines. Returns their template ids as an array.
+        """
+        return np.fromiter((self.add(message) for message in messages), dtype=np.int64, count=len(messages))
+
+    def match(self, message):
+        """
+        Template id of a log line without updating anything (-1 if no template matches):
+        one tree descent over its first tokens plus a scan of the leaf.
+        """
+        masked = self.mask_pattern.sub(WILDCARD, message)
+        template_id = self._cache.get(masked)
+        if template_id is not None:
+            return template_id
+        tokens = masked.split()
+        leaf = self._leaf(tokens, create=False)
+        template_id = self._best_match(leaf, tokens) if leaf else None
+        return -1 if template_id is None else template_id
+
+    def match_many(self, messages):
+        """
+        Template ids of a sequence of log lines, as an array (-1 where none matches).
+        """
+        return np.fromiter((self.match(message) for message in messages), dtype=np.int64, count=len(messages))
+
+    def _leaf(self, tokens, create):
+        # Descend length node, then one level per leading token; returns the leaf's id list
+        node = self._root
+        key = len(tokens)
+        for level in range(min(self.depth - 2, len(tokens)) + 1):
+            if level > 0:
+                token = tokens[level - 1]
+                if token in node:
+                    key = token
+                elif not create:
+                    key = WILDCARD
+                elif any(char.isdigit() for char in token):
+                    key = WILDCARD
+                elif len(node) + 1 < self.max_children:
+                    key = token
+                else:
+                    key = WILDCARD
+            child = node.get(key)
+            if child is None:
+                if not create:
+                    return None
+                child = node[key] = {}
+            node = child
+        # The leaf keeps its template ids under a key no token can take
+        if None not in node:
+            if not create:
+                return None
+            node[None] = []
+        return node[None]
+
+    def _best_match(self, leaf, tokens):
+        best_id, best_similarity, best_wildcards = None, -1.0, -1
+        for template_id in leaf:
+            template = self._templates[template_id]
+            equal = wildcards = 0
+            for token, old in zip(tokens, template):
+                # A masked variable matches a wildcard; a concrete token only itself
+                if token == old:
+                    equal += 1
+                if old == WILDCARD:
+                    wildcards += 1
+            similarity = equal / len(tokens) if tokens else 1.0
+            # Ties go to the more general template
+            if similarity > best_similarity or (similarity == best_similarity and wildcards > best_wildcards):
+                best_id, best_similarity, best_wildcards = template_id, similarity, wildcards
+        if best_id is None or best_similarity < self.similarity_threshold:
+            return None
+        return best_id
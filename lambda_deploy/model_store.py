@@ -0,0 +1,116 @@
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# Arrays smaller than a page stay inside the pickle: mapping them would not save anything
+MIN_MAPPED_BYTES = 4096
+SKELETON_FILE = "model.pkl"
+
+
+class _StorePickler(pickle.Pickler):
+    # Writes each large array to its own .npy file and pickles a reference in its place
+    def __init__(self, file, directory):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.directory = directory
+        self.array_files = {}  # id(array) -> file name, so shared arrays are written once
+
+    def persistent_id(self, obj):
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject or obj.nbytes < MIN_MAPPED_BYTES:
+            return None
+        name = self.array_files.get(id(obj))
+        if name is None:
+            name = self.array_files[id(obj)] = f"array_{len(self.array_files)}.npy"
+            np.save(os.path.join(self.directory, name), np.ascontiguousarray(obj), allow_pickle=False)
+        return name
+
+
+class _StoreUnpickler(pickle.Unpickler):
+    def __init__(self, file, directory, mmap_mode):
+        super().__init__(file)
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+
+    def persistent_load(self, name):
+        return np.load(os.path.join(self.directory, name), mmap_mode=self.mmap_mode, allow_pickle=False)
+
+    def find_class(self, module, name):
+        # Stores written by the training code refer to scripts.<module>; the Lambda
+        # bundle ships the same modules at the top level
+        try:
+            return super().find_class(module, name)
+        except ModuleNotFoundError:
+            if not module.startswith("scripts."):
+                raise
+            return super().find_class(module[len("scripts."):], name)
+
+
+def save_model(model, path):
+    """
+    Save a model as a memory-mappable store: a directory with every NumPy array of
+    at least MIN_MAPPED_BYTES in the model (tree node tables, leaf values, KMeans
+    centroids, TF-IDF idf vectors) as an uncompressed .npy file, whose data is
+    page-aligned, and a pickle of the rest that refers to them.
+
+    path is a symlink to a versioned directory next to it (<name>.v<suffix>). Each
+    save writes a complete new version and then swaps the link with an atomic
+    rename, so path always names a complete store and files are never changed in
+    place under processes that map them. The previous version is kept, so a
+    process that resolved the link just before the swap can finish loading; older
+    ones are deleted.
+    """
+    print(f"Saving model store to {path}...")
+    parent, name = os.path.split(os.path.abspath(path))
+    version_dir = tempfile.mkdtemp(dir=parent, prefix=name + ".v")
+    os.chmod(version_dir, 0o755)
+    with open(os.path.join(version_dir, SKELETON_FILE), "wb") as file:
+        _StorePickler(file, version_dir).dump(model)
+
+    previous = None
+    if os.path.islink(path):
+        previous = os.path.join(parent, os.readlink(path))
+    elif os.path.isdir(path):
+        # A store saved as a plain directory: move it aside once so the link can take its name
+        previous = tempfile.mkdtemp(dir=parent, prefix=name + ".v")
+        os.rename(path, previous)
+    link = version_dir + ".link"
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, path)
+
+    for entry in os.listdir(parent):
+        old_version = os.path.join(parent, entry)
+        if (entry.startswith(name + ".v") and old_version not in (version_dir, previous)
+                and os.path.isdir(old_version) and not os.path.islink(old_version)):
+            shutil.rmtree(old_version, ignore_errors=True)
+
+
+def load_model(path, mmap_mode="r"):
+    """
+    Load a model written by save_model. With mmap_mode="r" its arrays are read-only
+    memory maps of the store's files: loading reads only the small pickle, pages
+    are read on first access, and processes that load the same store share them
+    through the page cache instead of each holding a private copy. mmap_mode=None
+    reads the arrays into memory. Once loaded, the maps stay valid even if later
+    saves delete the version they came from.
+    """
+    while True:
+        # Resolve the link once per attempt, so every file comes from the same version
+        directory = os.path.realpath(path)
+        try:
+            with open(os.path.join(directory, SKELETON_FILE), "rb") as file:
+                return _StoreUnpickler(file, directory, mmap_mode).load()
+        except FileNotFoundError:
+            # Saves replaced this version and deleted it mid-load: retry with the current one
+            if os.path.realpath(path) == directory:
+                raise
+
+
+if __name__ == "__main__":
+    # Convert joblib pickles to stores: python -m scripts.model_store models/log_clustering_model.pkl ...
+    import joblib
+
+    for pickle_path in sys.argv[1:]:
+        save_model(joblib.load(pickle_path), os.path.splitext(pickle_path)[0] + ".store")
@@ -0,0 +1,91 @@
+import numpy as np
+
+DEFAULT_PIPELINE_PATH = "./models/preprocessing_pipeline.npz"
+
+
+class PreprocessingPipeline:
+    """
+    Fitted preprocessing transform (imputation, quasi-constant column drop, MinMax
+    scaling, mutual-information feature mask and PCA) for inference-time use.
+
+    Every step after imputation is affine, so they are folded into one weight
+    matrix and bias at fit time and transform() is a single matrix product.
+    The artifact is a plain .npz file and only needs NumPy to load.
+    """
+
+    def __init__(self, input_columns, fill_values, column_index, weights, bias):
+        self.input_columns = np.asarray(input_columns, dtype=str)
+        self.fill_values = np.asarray(fill_values, dtype=np.float64)
+        self.column_index = np.asarray(column_index, dtype=np.intp)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+
+    @classmethod
+    def from_fitted(cls, input_columns, fill_values, kept_columns, scaler, feature_mask, pca=None):
+        """
+        Build the pipeline from the objects fitted by preprocessing.load_and_preprocess_data.
+        """
+        input_columns = list(input_columns)
+        feature_mask = np.asarray(feature_mask, dtype=bool)
+        selected = np.asarray(kept_columns)[feature_mask]
+        column_index = [input_columns.index(column) for column in selected]
+
+        # MinMax scaling restricted to the selected columns: x * scale + min
+        scale = scaler.scale_[feature_mask]
+        offset = scaler.min_[feature_mask]
+        if pca is None:
+            weights = np.diag(scale)
+            bias = offset
+        else:
+            # PCA projection: (x_scaled - mean) @ components.T
+            weights = scale[:, None] * pca.components_.T
+            bias = (offset - pca.mean_) @ pca.components_.T
+
+        return cls(input_columns, fill_values, column_index, weights, bias)
+
+    @property
+    def n_features_out(self):
+        return self.weights.shape[1]
+
+    def transform(self, X):
+        """
+        Apply the fitted transform to raw metric rows.
+
+        X can be a DataFrame with the original metric columns or a 2D array whose
+        columns follow input_columns. Missing values are filled with training means.
+        """
+        if hasattr(X, "columns"):
+            X = X[list(self.input_columns)]
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.input_columns):
+            raise ValueError(f"Expected {len(self.input_columns)} columns {list(self.input_columns)}, got {X.shape[1]}")
+
+        X = X[:, self.column_index]
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.fill_values[self.column_index], X)
+        return X @ self.weights + self.bias
+
+    def save(self, path=DEFAULT_PIPELINE_PATH):
+        print(f"Saving preprocessing pipeline to {path}...")
+        np.savez(
+            path,
+            input_columns=self.input_columns,
+            fill_values=self.fill_values,
+            column_index=self.column_index,
+            weights=self.weights,
+            bias=self.bias,
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_PIPELINE_PATH):
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(
+                artifact["input_columns"],
+                artifact["fill_values"],
+                artifact["column_index"],
+                artifact["weights"],
+                artifact["bias"],
+            )
@@ -0,0 +1,210 @@
+"""
+Long-running HTTP/JSON server for the Lambda models. Run from lambda_deploy/:
+    python server.py --port 8080 --max-batch-size 64 --max-wait-ms 2
+
+POST / takes the same events as the Lambda handler and returns the same results,
+with HTTP status codes in place of raised exceptions: a body that is not a JSON
+event, a batch whose "requests" is not a list, or a single request that fails
+gets 400 with {"error": ...}; bodies over MAX_BODY_BYTES get 413. Requests inside
+a batch fail one by one with {"error": ...}, as in handle_batch, which also
+rejects nested batches.
+
+Concurrent requests for a model are coalesced into micro-batches (up to
+--max-batch-size requests, waiting at most --max-wait-ms after the first one) and
+served by one handle_batch call in a worker thread, so predictions never block the
+event loop. GET /stats reports requests, batches and the mean batch size per model.
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import lambda_function
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Queue of pending requests for one model. A single task drains it: it takes the
+    first waiting request, collects more until max_batch_size or until max_wait_ms
+    have passed, and runs lambda_function.handle_batch on them in the executor.
+    Requests that arrive while a batch runs form the next batch.
+    """
+
+    def __init__(self, executor, max_batch_size=64, max_wait_ms=2.0):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.requests = self.batches = 0
+        self.predict_seconds = 0.0
+        self._task = None
+
+    async def submit(self, request):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if self.queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+
+            start = time.perf_counter()
+            try:
+                response = await loop.run_in_executor(
+                    self.executor, lambda_function.handle_batch, [request for request, _ in batch]
+                )
+                results = response["results"]
+            except Exception as error:
+                results = [{"error": str(error)}] * len(batch)
+            self.predict_seconds += time.perf_counter() - start
+            self.requests += len(batch)
+            self.batches += 1
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "predict_ms": self.predict_seconds * 1000,
+        }
+
+
+class InferenceServer:
+    def __init__(self, max_batch_size=64, max_wait_ms=2.0):
+        # One thread per model: each batcher has at most one batch in flight
+        self.executor = ThreadPoolExecutor(max_workers=len(lambda_function.BATCH_ROUTES))
+        self.batchers = {route: MicroBatcher(self.executor, max_batch_size, max_wait_ms)
+                         for route in lambda_function.BATCH_ROUTES}
+
+    async def handle_event(self, event):
+        """
+        Result for one Lambda event; model requests go through their route's batcher.
+        """
+        if not isinstance(event, dict):
+            return {"error": "Invalid event type"}
+        if event.get("type") == "log_clustering":
+            # The handler reports the cache counters with single log clustering results
+            result = await self.batchers["log_clustering"].submit(event)
+            if "error" in result:
+                return result
+            return {**result, "cache": lambda_function.get_model("log_clustering").stats()}
+        if event.get("type") in self.batchers:
+            return await self.batchers[event["type"]].submit(event)
+        if event.get("type") == "batch":
+            requests = event.get("requests", [])
+            if not isinstance(requests, list):
+                raise ValueError('"requests" must be a list of events')
+            return {"results": list(await asyncio.gather(*(self.handle_batch_request(request)
+                                                              for request in requests)))}
+        # warm_up and invalid types: no model call to batch
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda_function.handler, event, None)
+
+    async def handle_batch_request(self, request):
+        # Only model requests can be batched, as in handle_batch
+        if not isinstance(request, dict) or request.get("type") not in self.batchers:
+            return {"error": "Invalid event type"}
+        return await self.batchers[request["type"]].submit(request)
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive: one JSON request body per request
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    # The body is not read, so the connection cannot be reused
+                    await self.respond(writer, 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"})
+                    break
+                body = await reader.readexactly(length)
+
+                if target == "/stats" and method == "GET":
+                    status, result = 200, {route: batcher.stats() for route, batcher in self.batchers.items()}
+                elif target != "/":
+                    status, result = 404, {"error": f"Unknown path {target}"}
+                elif method != "POST":
+                    status, result = 405, {"error": "Use POST with a JSON event"}
+                else:
+                    try:
+                        result = await self.handle_event(json.loads(body))
+                        status = 400 if "error" in result else 200
+                    except json.JSONDecodeError as error:
+                        status, result = 400, {"error": f"Invalid JSON: {error}"}
+                    except Exception as error:
+                        # The handler would raise: report it instead of dropping the connection
+                        status, result = 400, {"error": str(error)}
+
+                await self.respond(writer, status, result)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, result):
+        payload = json.dumps(result).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        await writer.drain()
+
+    async def serve(self, host, port, warm_up="all"):
+        # Load the models before accepting connections, so the first requests do not pay for it
+        loaded = await asyncio.get_running_loop().run_in_executor(self.executor, lambda_function.warm_up, warm_up)
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"Serving {', '.join(loaded) or 'no preloaded models'} on http://{host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--warm-up", default="all",
+                        help='models to load at startup: "all", "" for none, or a comma-separated list')
+    args = parser.parse_args()
+
+    server = InferenceServer(args.max_batch_size, args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.warm_up))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,84 @@
 import numpy as np
 import pandas as pd
-from scripts import preprocessing, anomaly_detection, predictive_maintenance, log_analysis
+from scripts import preprocessing_cache, anomaly_detection, predictive_maintenance, log_analysis, rules
+from scripts import hyperparameter_search
 
 # File paths
 DATA_FILE = "./data/synthetic_cloudwatch_metrics.csv"
 ANOMALY_MODEL_FILE = "./models/anomaly_model.pkl"
+ANOMALY_ARRAY_FILE = "./models/anomaly_model.npz"
+ANOMALY_STORE_DIR = "./models/anomaly_model.store"  # Memory-mapped, shared between processes
 REGRESSION_MODEL_FILE = "./models/trained_model.pkl"
+REGRESSION_ARRAY_FILE = "./models/trained_model.npz"
+REGRESSION_STORE_DIR = "./models/trained_model.store"
+PIPELINE_FILE = "./models/preprocessing_pipeline.npz"
 LOG_FILE = "./data/synthetic_cloudwatch_logs.log"
+LOG_FILES = None  # Directory or glob of per-instance log files (e.g. "./logs/*.log"); analyzed in parallel when set
+CACHE_DIR = "./cache/preprocessing"
+
+# Set to tune the regressor with a budgeted Hyperband search instead of the fixed settings below
+TUNE_HYPERPARAMETERS = False
+SEARCH_TIME_BUDGET = 300  # Seconds
+# Set to cluster logs online (hashing vectorizer + mini-batch KMeans, checkpointed to ./models)
+ONLINE_LOG_CLUSTERING = False
 
 def main():
     # Step 1: Preprocess the data
     print("=== Step 1: Preprocessing Data ===")
     # You can now pass n_components to use PCA if needed
-    X, y, scaler = preprocessing.load_and_preprocess_data(DATA_FILE, n_components=5)  # 5 components for PCA
+    # Results are cached by file hash + parameters, so unchanged inputs skip preprocessing
+    X, y, scaler = preprocessing_cache.cached_load_and_preprocess_data(
+        DATA_FILE, cache_dir=CACHE_DIR, n_components=5, pipeline_path=PIPELINE_FILE
+    )  # 5 components for PCA; the fitted transform is saved for inference
 
     # Step 2: Train anomaly detection model
     print("\n=== Step 2: Training Anomaly Detection Model ===")
-    anomaly_model = anomaly_detection.train_anomaly_detection_model(X, ANOMALY_MODEL_FILE)  # Train Isolation Forest
+    anomaly_model = anomaly_detection.train_anomaly_detection_model(
+        X, ANOMALY_MODEL_FILE, array_path=ANOMALY_ARRAY_FILE, store_path=ANOMALY_STORE_DIR
+    )  # Train Isolation Forest (plus the array export for the Lambda)
     anomaly_predictions = anomaly_detection.predict_anomalies(X, anomaly_model)  # Predict anomalies with Isolation Forest
     
-    # Apply threshold-based anomaly detection for CPU usage (assuming CPU usage is in the first column)
-    cpu_usage = X[:, 0]  # Assuming CPU usage is in the first feature column
-    cpu_anomalies = anomaly_detection.threshold_based_anomaly_detection(cpu_usage)
+    # Apply the metric rules (CPU deviation, memory, disk IO, network, error rate) to the raw metrics.
+    # Rates and N-of-M windows need the full time series, so evaluate before aligning to the rows kept in X
+    raw_metrics = pd.read_csv(DATA_FILE)
+    rule_results = rules.evaluate_rules(raw_metrics, rules.DEFAULT_RULES)
+    rule_anomalies = rule_results["anomaly"][raw_metrics.index.get_indexer(y.index)]
+    print(f"Rule hits: {rule_results['rule_hits']}")
 
-    # Combine results from both methods: Isolation Forest and CPU usage threshold detection
-    combined_anomalies = np.logical_or(anomaly_predictions == -1, cpu_anomalies)
+    # Combine results from both methods: Isolation Forest and rule-based detection
+    combined_anomalies = np.logical_or(anomaly_predictions == -1, rule_anomalies)
 
     # Output number of anomalies detected
     print(f"Anomalies detected (combined method): {sum(combined_anomalies)}")
 
     # Step 3: Train predictive maintenance model
     print("\n=== Step 3: Training Predictive Maintenance Model ===")
+    regression_params = dict(n_estimators=100, max_depth=10)
+    if TUNE_HYPERPARAMETERS:
+        best_model, search_results = hyperparameter_search.search_hyperparameters(
+            X, y, "regressor", time_budget=SEARCH_TIME_BUDGET
+        )
+        print(search_results.head(10).to_string())
+        regression_params = {name: best_model.get_params()[name] for name in hyperparameter_search.REGRESSOR_SPACE}
     regression_model = predictive_maintenance.train_predictive_maintenance_model(
-        X, y, REGRESSION_MODEL_FILE, n_estimators=100, max_depth=10
-    )  # Train with hyperparameters: n_estimators and max_depth
+        X, y, REGRESSION_MODEL_FILE, array_path=REGRESSION_ARRAY_FILE, store_path=REGRESSION_STORE_DIR,
+        **regression_params
+    )  # Train with hyperparameters: n_estimators and max_depth (or the tuned ones), plus the compact export
 
 
     # Step 4: Log Analysis using NLP model
     print("\n=== Step 4: Log Analysis using NLP model ===")
     # Log analysis
+    if LOG_FILES:
+        _, file_stats, templates = log_analysis.analyze_log_files(LOG_FILES, num_clusters=3)
+        print(templates.head(20).to_string())
+        return
+    if ONLINE_LOG_CLUSTERING:
+        # Streams the log file batch by batch; memory does not grow with its size
+        _, cluster_counts = log_analysis.categorize_logs_online(LOG_FILE, num_clusters=3)
+        for cluster, count in enumerate(cluster_counts):
+            print(f"Cluster {cluster}: {count} logs")
+        return
     processed_logs = log_analysis.preprocess_logs(LOG_FILE)  # Preprocess logs
     log_clusters, processed_logs = log_analysis.categorize_logs(processed_logs)  # Categorize logs
     log_analysis.visualize_clusters(log_clusters, processed_logs, num_clusters=3)  # Visualize the log clusters
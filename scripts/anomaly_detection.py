@@ -1,26 +1,152 @@
 from sklearn.ensemble import IsolationForest
-from scripts import preprocessing
+from scripts import preprocessing, rules
+from scripts.array_forest import export_isolation_forest
+from scripts.model_store import save_model
 import joblib
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+import os
+import time
 
 DATA_FILE = "./data/synthetic_cloudwatch_metrics.csv"
 
-def train_anomaly_detection_model(X, model_path, contamination=0.05, n_estimators=100, max_samples="auto"):
+def train_anomaly_detection_model(X, model_path, contamination=0.05, n_estimators=100, max_samples="auto", array_path=None,
+                                  store_path=None):
     """
     Train an Isolation Forest model to detect anomalies in cloud metrics.
+    Pass array_path to also export the NumPy-only version used by the Lambda, and
+    store_path to also save that version as a memory-mapped model store.
     """
     print("Training anomaly detection model...")
-    # Initialize IsolationForest model with provided parameters
-    model = IsolationForest(contamination=contamination, n_estimators=n_estimators, max_samples=max_samples, random_state=42)
+    model = build_anomaly_detection_model(contamination, n_estimators, max_samples)
     model.fit(X)
 
     # Save the trained model
     print(f"Saving anomaly detection model to {model_path}...")
     joblib.dump(model, model_path)
+    save_training_summary(model, X, stats_path_for(model_path))
+    if array_path:
+        array_model = export_isolation_forest(model, array_path)
+        if store_path:
+            save_model(array_model, store_path)
     
     return model
 
+def stats_path_for(model_path):
+    """
+    Location of the training summary kept next to a model file.
+    """
+    return os.path.splitext(model_path)[0] + "_stats.npz"
+
+def save_training_summary(model, X, stats_path, n_bins=10, refresh_count=0):
+    """
+    Store what drift detection needs about the data the model was fit on:
+    per-feature mean/std and a histogram of the model's own scores.
+    """
+    X = np.asarray(X)
+    scores = model.score_samples(X)
+    # Quantile bin edges, so each bin holds ~10% of the training scores
+    edges = np.unique(np.quantile(scores, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, scores), minlength=len(edges) + 1)
+    np.savez(
+        stats_path,
+        feature_mean=X.mean(axis=0),
+        feature_std=X.std(axis=0),
+        score_edges=edges,
+        score_distribution=counts / counts.sum(),
+        refresh_count=refresh_count,
+    )
+
+def population_stability_index(expected, actual, eps=1e-4):
+    """
+    PSI between two binned distributions; < 0.1 is usually read as no shift, > 0.25 as a major one.
+    """
+    expected = np.clip(expected, eps, None)
+    actual = np.clip(actual, eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def refresh_anomaly_detection_model(X_recent, model_path, drift_threshold=0.2, mean_shift_threshold=0.5,
+                                    replace_fraction=0.2, array_path=None, store_path=None,
+                                    **train_kwargs):
+    """
+    Hourly refresh of the Isolation Forest that only refits from scratch when the data has drifted.
+
+    Drift is the PSI between the stored training score histogram and the current
+    model's scores on X_recent, plus the largest shift of a feature mean in units
+    of its training std (and a check that the feature set is unchanged).
+    Below both thresholds, the oldest replace_fraction of the trees are dropped
+    and replaced with trees grown on X_recent via warm_start; the rest are kept.
+    Otherwise (or when X_recent has fewer rows than the trees' subsample size) the
+    model is retrained on X_recent with train_anomaly_detection_model.
+    """
+    start = time.perf_counter()
+    X_recent = np.asarray(X_recent)
+    stats_path = stats_path_for(model_path)
+
+    reason = None
+    if not (os.path.exists(model_path) and os.path.exists(stats_path)):
+        reason = "no previous model or training summary"
+    else:
+        model = joblib.load(model_path)
+        with np.load(stats_path) as artifact:
+            stats = {name: artifact[name] for name in artifact.files}
+        if model.n_features_in_ != X_recent.shape[1]:
+            reason = f"feature count changed ({model.n_features_in_} -> {X_recent.shape[1]})"
+        elif len(X_recent) < model.max_samples_:
+            # Kept trees were grown on max_samples_ rows; new ones could not be, and the
+            # score normalization would no longer match the kept trees
+            reason = f"fewer recent rows ({len(X_recent)}) than the trees' subsample size ({model.max_samples_})"
+        else:
+            scores = model.score_samples(X_recent)
+            counts = np.bincount(np.searchsorted(stats["score_edges"], scores), minlength=len(stats["score_edges"]) + 1)
+            psi = population_stability_index(stats["score_distribution"], counts / counts.sum())
+            with np.errstate(divide="ignore", invalid="ignore"):
+                shift = np.abs(X_recent.mean(axis=0) - stats["feature_mean"]) / stats["feature_std"]
+            mean_shift = float(np.nanmax(np.where(np.isinf(shift), np.nan, shift), initial=0.0))
+            if psi > drift_threshold:
+                reason = f"drift detected (PSI={psi:.3f} > {drift_threshold})"
+            elif mean_shift > mean_shift_threshold:
+                reason = f"drift detected (mean shift={mean_shift:.2f} std > {mean_shift_threshold})"
+
+    if reason is not None:
+        print(f"Anomaly model refresh: full retrain, {reason}")
+        model = train_anomaly_detection_model(X_recent, model_path, array_path=array_path, store_path=store_path,
+                                              **train_kwargs)
+        print(f"Anomaly model refresh took {time.perf_counter() - start:.2f}s (full retrain)")
+        return model
+
+    # Warm start: drop the oldest trees and grow the same number on recent data
+    n_trees = len(model.estimators_)
+    n_replace = max(1, int(round(n_trees * replace_fraction)))
+    refresh_count = int(stats["refresh_count"]) + 1
+    print(f"Anomaly model refresh: warm start, PSI={psi:.3f}, mean shift={mean_shift:.2f} std; "
+          f"replacing {n_replace} of {n_trees} trees")
+    model.estimators_ = model.estimators_[n_replace:]
+    model.estimators_features_ = model.estimators_features_[n_replace:]
+    # A fresh seed per refresh, so replacement trees do not reuse earlier subsamples. The
+    # subsample size is pinned, since the path-length normalization applies to every tree
+    model.set_params(n_estimators=n_trees, warm_start=True, random_state=42 + refresh_count,
+                     max_samples=model.max_samples_)
+    model.fit(X_recent)
+    model.set_params(warm_start=False)
+
+    print(f"Saving anomaly detection model to {model_path}...")
+    joblib.dump(model, model_path)
+    save_training_summary(model, X_recent, stats_path, refresh_count=refresh_count)
+    if array_path:
+        array_model = export_isolation_forest(model, array_path)
+        if store_path:
+            save_model(array_model, store_path)
+    print(f"Anomaly model refresh took {time.perf_counter() - start:.2f}s (warm start)")
+    return model
+
+def build_anomaly_detection_model(contamination=0.05, n_estimators=100, max_samples="auto"):
+    """
+    Initialize an (unfitted) Isolation Forest with the project's settings.
+    """
+    return IsolationForest(contamination=contamination, n_estimators=n_estimators, max_samples=max_samples, random_state=42)
+
 def predict_anomalies(X, model):
     """
     Predict anomalies in the dataset using the trained Isolation Forest model.
@@ -73,12 +199,12 @@ def main():
     # Predict anomalies using the Isolation Forest model
     predictions = predict_anomalies(X, model)
 
-    # Apply threshold-based anomaly detection for CPU usage
-    cpu_usage = X[:, 0]  # Assuming the first column represents CPU usage in the dataset
-    cpu_anomalies = threshold_based_anomaly_detection(cpu_usage)
+    # Apply the rule-based checks to the raw metrics (X holds transformed features, not CPU)
+    raw_metrics = pd.read_csv(DATA_FILE)
+    rule_anomalies = rules.evaluate_rules(raw_metrics)["anomaly"][raw_metrics.index.get_indexer(y.index)]
 
-    # Combine both anomaly detection approaches (machine learning and threshold-based)
-    combined_anomalies = np.logical_or(predictions == -1, cpu_anomalies)
+    # Combine both anomaly detection approaches (machine learning and rule-based)
+    combined_anomalies = np.logical_or(predictions == -1, rule_anomalies)
 
     # If you have true anomaly labels 'y', you can evaluate the model
     evaluate_model(combined_anomalies, y)
@@ -0,0 +1,361 @@
+import numpy as np
+
+
+def _average_path_length(n_samples):
+    """
+    Average path length of an unsuccessful BST search in a tree built on n samples
+    (same formula and operation order as sklearn's IsolationForest).
+    """
+    n_samples = np.asarray(n_samples)
+    shape = n_samples.shape
+    n_samples = n_samples.reshape((1, -1))
+    average_path_length = np.zeros(n_samples.shape)
+
+    mask_1 = n_samples <= 1
+    mask_2 = n_samples == 2
+    not_mask = ~np.logical_or(mask_1, mask_2)
+
+    average_path_length[mask_1] = 0.0
+    average_path_length[mask_2] = 1.0
+    average_path_length[not_mask] = (
+        2.0 * (np.log(n_samples[not_mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples[not_mask] - 1.0) / n_samples[not_mask]
+    )
+    return average_path_length.reshape(shape)
+
+
+def _node_depths(children_left, children_right):
+    # Root has depth 1, as in sklearn's Tree.compute_node_depths
+    depths = np.ones(len(children_left))
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        for child in (children_left[node], children_right[node]):
+            if child != -1:
+                depths[child] = depths[node] + 1
+                stack.append(child)
+    return depths
+
+
+def _check_features(X, n_features):
+    # sklearn rejects inputs of the wrong width; the flat traversal would silently read other columns
+    X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    if X.ndim != 2 or X.shape[1] != n_features:
+        raise ValueError(f"X has {X.shape[-1]} features, but the model expects {n_features}")
+    return X
+
+
+def _apply_trees(X, next_nodes, feature, threshold, roots, max_depth, missing_go_to_left, chunk_size):
+    """
+    Global leaf index reached in every tree, shape (n_samples, n_trees).
+    next_nodes[2 * node + go_right] is the next node; leaves point to themselves.
+    """
+    # sklearn compares float32 inputs against the thresholds
+    X = np.asarray(X, dtype=np.float32)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    n_samples, n_features = X.shape
+    has_nan = np.isnan(X).any()
+    leaves = np.empty((n_samples, len(roots)), dtype=np.intp)
+    # Work buffers reused at every level, so the traversal does not allocate per step
+    x = np.empty((min(chunk_size, n_samples), len(roots)), dtype=X.dtype)
+    split = np.empty(x.shape, dtype=threshold.dtype)
+    go_right = np.empty(x.shape, dtype=bool)
+    index = np.empty(x.shape, dtype=np.intp)
+    for start in range(0, n_samples, chunk_size):
+        chunk = X[start:start + chunk_size]
+        rows = len(chunk)
+        values = chunk.ravel()
+        row_offset = (np.arange(rows) * n_features)[:, None]
+        nodes = leaves[start:start + rows]
+        nodes[:] = roots
+        # Every tree advances one level per step for all rows at once
+        for _ in range(max_depth):
+            if n_features == 1:
+                chunk_x = values[:, None]  # Nothing to gather with a single feature
+            else:
+                np.add(row_offset, feature.take(nodes), out=index[:rows])
+                chunk_x = values.take(index[:rows], out=x[:rows])
+            np.greater(chunk_x, threshold.take(nodes, out=split[:rows]), out=go_right[:rows])
+            if has_nan:
+                go_right[:rows] = np.where(np.isnan(chunk_x), ~missing_go_to_left.take(nodes), go_right[:rows])
+            np.multiply(nodes, 2, out=index[:rows])
+            index[:rows] += go_right[:rows]
+            next_nodes.take(index[:rows], out=nodes)
+    return leaves
+
+
+def export_isolation_forest(model, path):
+    """
+    Flatten a fitted sklearn IsolationForest into contiguous NumPy arrays.
+
+    All trees share one node table. Per node we keep the split feature and
+    threshold, the global indices of both children (leaves point to themselves,
+    so traversal can run a fixed number of steps) and the path length a sample
+    ending there contributes: depth + c(n_node_samples) - 1, with the root at
+    depth 1. Reads only the fitted attributes, so this module does not import sklearn.
+    """
+    remap_features = model._max_features != model.n_features_in_
+    features, thresholds, children, path_lengths, missing_left, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for tree, tree_features in zip(model.estimators_, model.estimators_features_):
+        t = tree.tree_
+        leaf = t.children_left == -1
+        node_ids = np.arange(t.node_count)
+        feature = np.where(leaf, 0, t.feature)
+        if remap_features:
+            feature = np.asarray(tree_features)[feature]
+        depths = _node_depths(t.children_left, t.children_right)
+
+        roots.append(offset)
+        features.append(feature)
+        thresholds.append(np.where(leaf, np.inf, t.threshold))
+        children.append(np.column_stack([
+            np.where(leaf, node_ids, t.children_left),
+            np.where(leaf, node_ids, t.children_right),
+        ]) + offset)
+        path_lengths.append(depths + _average_path_length(t.n_node_samples) - 1.0)
+        missing_left.append(t.missing_go_to_left.astype(bool) if hasattr(t, "missing_go_to_left")
+                            else np.ones(t.node_count, dtype=bool))
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+
+    denominator = len(model.estimators_) * _average_path_length([model.max_samples_])
+    arrays = dict(
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        children=np.concatenate(children).astype(np.int32),
+        path_length=np.concatenate(path_lengths).astype(np.float64),
+        missing_go_to_left=np.concatenate(missing_left),
+        roots=np.asarray(roots, dtype=np.int32),
+        denominator=np.asarray(denominator, dtype=np.float64).reshape(()),
+        offset=np.asarray(model.offset_, dtype=np.float64),
+        n_features=np.asarray(model.n_features_in_),
+        max_depth=np.asarray(max_depth),
+    )
+    print(f"Exporting Isolation Forest ({len(roots)} trees, {offset} nodes) to {path}...")
+    np.savez(path, **arrays)
+    return ArrayIsolationForest(arrays)
+
+
+class ArrayIsolationForest:
+    """
+    NumPy-only evaluator for an Isolation Forest exported by export_isolation_forest.
+    Reproduces IsolationForest.score_samples, decision_function and predict.
+    Single-feature models (e.g. after PCA to one component) are scored by a binary
+    search in a table of the forest's step function, built when the model is loaded.
+    """
+
+    def __init__(self, arrays, chunk_size=256):
+        # Rounded down to float32 as in the regression export: exact for float32 inputs, half the traffic
+        self.threshold = _float32_floor(arrays["threshold"])
+        self.path_length = arrays["path_length"]
+        self.missing_go_to_left = arrays["missing_go_to_left"]
+        self.denominator = float(arrays["denominator"])
+        self.offset_ = float(arrays["offset"])
+        self.n_features_in_ = int(arrays["n_features"])
+        self.max_depth = int(arrays["max_depth"])
+        # Rows scored per pass; keeps the (rows x trees) working set in cache
+        self.chunk_size = chunk_size
+        # children[2 * node + go_right] is the next node; native index width makes take() cheaper.
+        # Only these widened tables are kept (and pickled), not the exported int32 ones
+        self._next = arrays["children"].ravel().astype(np.intp)
+        self._feature = arrays["feature"].astype(np.intp)
+        self._roots = arrays["roots"].astype(np.intp)
+        self._steps = self._step_table() if self.n_features_in_ == 1 else None
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls({name: artifact[name] for name in artifact.files})
+
+    def apply(self, X):
+        """
+        Global leaf index reached in every tree, shape (n_samples, n_trees).
+        """
+        X = _check_features(X, self.n_features_in_)
+        return _apply_trees(X, self._next, self._feature, self.threshold, self._roots, self.max_depth,
+                            self.missing_go_to_left, self.chunk_size)
+
+    def score_samples(self, X):
+        """
+        Opposite of the anomaly score defined in the original paper, as in sklearn.
+        """
+        X = _check_features(X, self.n_features_in_)
+        if self.n_features_in_ != 1:
+            return self._walk_scores(X)
+        # A single-feature forest is a step function of x: look its score up instead of walking the trees
+        breaks, step_scores = self._steps
+        x = X[:, 0]
+        scores = step_scores[np.searchsorted(breaks, x)]
+        missing = np.isnan(x)
+        if missing.any():
+            scores[missing] = self._walk_scores(X[missing])
+        return scores
+
+    def _walk_scores(self, X):
+        path_lengths = self.path_length.take(self.apply(X).T)
+        depths = np.zeros(path_lengths.shape[1])
+        # Accumulate tree by tree, in the same order as sklearn, so results match bit for bit
+        for tree_path_lengths in path_lengths:
+            depths += tree_path_lengths
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2 ** (-np.divide(depths, self.denominator)))
+
+    def _step_table(self):
+        """
+        Split thresholds in order and the score of every interval between them. Every
+        x with the same k = searchsorted(breaks, x) is above the same k thresholds and
+        so reaches the same leaves; breaks[k] (and inf past the last one) is such an x.
+        """
+        breaks = np.unique(self.threshold[np.isfinite(self.threshold)])
+        return breaks, self._walk_scores(np.append(breaks, np.inf)[:, None])
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X):
+        """
+        Returns 1 for normal, -1 for anomaly.
+        """
+        predictions = np.ones(len(np.atleast_2d(X)), dtype=int)
+        predictions[self.decision_function(X) < 0] = -1
+        return predictions
+
+
+def _float32_floor(values):
+    # Largest float32 <= each value: for float32 inputs x, x > t exactly when x > floor32(t)
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def select_trees(tree_predictions, tolerance):
+    """
+    Greedy ordered aggregation: repeatedly add the tree that brings the running
+    mean closest to the full forest's prediction, until the RMSE between the two
+    is at most tolerance. tree_predictions is (n_trees, n_samples).
+    Returns the indices of the kept trees, in the order they were picked.
+    """
+    target = tree_predictions.mean(axis=0)
+    remaining = list(range(len(tree_predictions)))
+    kept = []
+    total = np.zeros(tree_predictions.shape[1])
+    while remaining:
+        candidates = tree_predictions[remaining]
+        errors = np.sqrt((((total + candidates) / (len(kept) + 1) - target) ** 2).mean(axis=1))
+        best = int(np.argmin(errors))
+        kept.append(remaining.pop(best))
+        total += tree_predictions[kept[-1]]
+        if errors[best] <= tolerance:
+            break
+    return np.asarray(kept)
+
+
+def export_random_forest(model, path, X_reference=None, prune_tolerance=None):
+    """
+    Pack a fitted single-output RandomForestRegressor (or any forest of sklearn
+    regression trees) into small flat arrays, written with np.savez_compressed.
+
+    Per node only a uint8/uint16 split feature, a float32 threshold and a uint16
+    offset to the right child are kept: sklearn stores nodes depth-first, so the
+    left child is always the next node. Thresholds are rounded down to float32,
+    which keeps every comparison against float32 inputs exact; leaf values are
+    stored as float32, once per leaf. With prune_tolerance set, trees are picked
+    greedily (select_trees) on X_reference until the pruned forest's predictions
+    are within that RMSE of the full forest, and the rest are dropped.
+    """
+    estimators = list(model.estimators_)
+    if estimators[0].tree_.value.shape[1] != 1:
+        raise ValueError("Only single-output regression forests can be exported")
+    if prune_tolerance is not None:
+        if X_reference is None:
+            raise ValueError("prune_tolerance needs X_reference to measure each tree's contribution")
+        X_reference = np.asarray(X_reference, dtype=np.float32)
+        tree_predictions = np.stack([tree.predict(X_reference) for tree in estimators])
+        kept = select_trees(tree_predictions, prune_tolerance)
+        print(f"Keeping {len(kept)} of {len(estimators)} trees (RMSE to the full forest <= {prune_tolerance})")
+        estimators = [estimators[i] for i in np.sort(kept)]
+
+    features, thresholds, right_offsets, missing_left, leaf_values, node_counts = [], [], [], [], [], []
+    max_depth = 0
+    for tree in estimators:
+        t = tree.tree_
+        if t.node_count > np.iinfo(np.uint16).max:
+            raise ValueError(f"Trees with more than {np.iinfo(np.uint16).max} nodes are not supported")
+        leaf = t.children_left == -1
+        node_ids = np.arange(t.node_count)
+        features.append(np.where(leaf, 0, t.feature))
+        thresholds.append(np.where(leaf, np.inf, t.threshold))
+        right_offsets.append(np.where(leaf, 0, t.children_right - node_ids))
+        missing_left.append(t.missing_go_to_left.astype(bool) if hasattr(t, "missing_go_to_left")
+                            else np.ones(t.node_count, dtype=bool))
+        leaf_values.append(t.value[leaf, 0, 0])
+        node_counts.append(t.node_count)
+        max_depth = max(max_depth, t.max_depth)
+
+    feature_dtype = np.uint8 if model.n_features_in_ <= 256 else np.uint16
+    arrays = dict(
+        feature=np.concatenate(features).astype(feature_dtype),
+        threshold=_float32_floor(np.concatenate(thresholds)),
+        right_offset=np.concatenate(right_offsets).astype(np.uint16),
+        missing_go_to_left=np.concatenate(missing_left),
+        leaf_value=np.concatenate(leaf_values).astype(np.float32),
+        node_counts=np.asarray(node_counts, dtype=np.uint16),
+        n_features=np.asarray(model.n_features_in_),
+        max_depth=np.asarray(max_depth),
+    )
+    print(f"Exporting random forest ({len(estimators)} trees, {sum(node_counts)} nodes) to {path}...")
+    np.savez_compressed(path, **arrays)
+    return ArrayRandomForest(arrays)
+
+
+class ArrayRandomForest:
+    """
+    NumPy-only batch predictor for a forest exported by export_random_forest.
+    predict(X) averages the trees like RandomForestRegressor.predict.
+    """
+
+    def __init__(self, arrays, chunk_size=256):
+        node_counts = arrays["node_counts"].astype(np.intp)
+        self.n_trees = len(node_counts)
+        self.n_features_in_ = int(arrays["n_features"])
+        self.max_depth = int(arrays["max_depth"])
+        self.chunk_size = chunk_size
+        self.threshold = arrays["threshold"]
+        self.missing_go_to_left = arrays["missing_go_to_left"]
+        self._feature = arrays["feature"].astype(np.intp)
+        self._roots = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.intp)
+
+        # Rebuild the global child table: left is the next node, leaves point to themselves
+        nodes = np.arange(len(self.threshold))
+        right_offset = arrays["right_offset"].astype(np.intp)
+        leaf = right_offset == 0
+        children = np.column_stack([np.where(leaf, nodes, nodes + 1), nodes + right_offset])
+        self._next = children.ravel()
+        self.leaf_value = np.zeros(len(nodes))
+        self.leaf_value[leaf] = arrays["leaf_value"]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls({name: artifact[name] for name in artifact.files})
+
+    def apply(self, X):
+        """
+        Global leaf index reached in every tree, shape (n_samples, n_trees).
+        """
+        X = _check_features(X, self.n_features_in_)
+        return _apply_trees(X, self._next, self._feature, self.threshold, self._roots, self.max_depth,
+                            self.missing_go_to_left, self.chunk_size)
+
+    def predict(self, X):
+        leaf_values = self.leaf_value.take(self.apply(X).T)
+        prediction = np.zeros(leaf_values.shape[1])
+        # Same tree-by-tree accumulation order as sklearn
+        for tree_values in leaf_values:
+            prediction += tree_values
+        return prediction / self.n_trees
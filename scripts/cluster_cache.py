@@ -0,0 +1,97 @@
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Per-entry bookkeeping on top of the key and value objects: the OrderedDict's hash
+# table slot and linked-list node
+ENTRY_OVERHEAD_BYTES = 100
+
+
+class ClusterAssignmentCache:
+    """
+    Memoized log message -> cluster assignment in front of a vectorizer + clustering
+    model (TF-IDF or hashing vectorizer with KMeans / MiniBatchKMeans).
+
+    Messages are normalized (variable fields masked with mask_pattern, whitespace
+    collapsed, lowercased, as the vectorizers lowercase anyway) and keyed by the
+    normalized text. Hits return the cached cluster without vectorizing; the
+    misses of a call are deduplicated and their normalized text is classified
+    with a single transform + predict, so every message that normalizes the same
+    way gets the same cluster whether or not it was cached. Entries are evicted
+    least recently used once the cache would exceed max_bytes. Hit, miss and
+    eviction counts and the time spent in lookups and in the model are kept in
+    stats().
+    """
+
+    def __init__(self, vectorizer, model, max_bytes=8 * 1024 * 1024, mask_pattern=None, wildcard="<*>"):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.max_bytes = max_bytes
+        self.mask_pattern = mask_pattern
+        self.wildcard = wildcard
+        self._entries = OrderedDict()
+        self.n_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lookup_seconds = self.model_seconds = 0.0
+
+    def normalize(self, message):
+        if self.mask_pattern is not None:
+            message = self.mask_pattern.sub(self.wildcard, message)
+        return " ".join(message.lower().split())
+
+    def predict(self, messages):
+        """
+        Cluster ids for a list of log messages: model.predict(vectorizer.transform(...)) of
+        their normalized text.
+        """
+        start = time.perf_counter()
+        clusters = np.empty(len(messages), dtype=np.int64)
+        missing = {}  # normalized message -> positions
+        entries = self._entries
+        for position, message in enumerate(messages):
+            key = self.normalize(message)
+            cluster = entries.get(key)
+            if cluster is None:
+                missing.setdefault(key, []).append(position)
+            else:
+                entries.move_to_end(key)
+                clusters[position] = cluster
+                self.hits += 1
+        self.lookup_seconds += time.perf_counter() - start
+
+        if missing:
+            start = time.perf_counter()
+            predicted = self.model.predict(self.vectorizer.transform(list(missing)))
+            self.model_seconds += time.perf_counter() - start
+            for (key, positions), cluster in zip(missing.items(), predicted.tolist()):
+                clusters[positions] = cluster
+                self.misses += len(positions)
+                self._store(key, cluster)
+        return clusters
+
+    def _store(self, key, cluster):
+        size = sys.getsizeof(key) + sys.getsizeof(cluster) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        self._entries[key] = cluster
+        self.n_bytes += size
+        while self.n_bytes > self.max_bytes:
+            old_key, old_cluster = self._entries.popitem(last=False)
+            self.n_bytes -= sys.getsizeof(old_key) + sys.getsizeof(old_cluster) + ENTRY_OVERHEAD_BYTES
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.n_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "lookup_ms": self.lookup_seconds * 1000,
+            "model_ms": self.model_seconds * 1000,
+            "us_per_message": (self.lookup_seconds + self.model_seconds) * 1e6 / lookups if lookups else 0.0,
+        }
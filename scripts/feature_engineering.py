@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+METRICS = ["CPU_Utilization", "Memory_Usage_MB", "Disk_IO_MBps", "Network_In_Mbps", "Network_Out_Mbps",
+           "Error_Rate_Percentage"]
+
+
+def build_forecast_features(df, metrics=None, lags=(1, 5, 15), windows=(5, 15, 60), horizon=15,
+                            target="Error_Rate_Percentage", time_column="Timestamp", group_column=None,
+                            dropna=True, dtype=np.float32):
+    """
+    Build lag, rolling mean/std/max and slope features for every metric, plus the
+    target `horizon` periods ahead, for time-to-failure forecasting.
+
+    Rows are ordered by (group_column, time_column); with the 1-minute CloudWatch
+    period, lags, windows and horizon are in minutes. Every statistic is computed
+    over all groups at once on the sorted arrays (cumulative sums for mean, std and
+    slope, block-wise running maxima for max), and values whose window, lag or
+    horizon would cross a group boundary are set to NaN. dropna=True removes those
+    rows. Features are float32 by default, the precision sklearn's forests use.
+    Returns (features, future_target) in (group, time) order, with df's index labels.
+    """
+    metrics = [m for m in (metrics or METRICS) if m in df.columns]
+    n_rows = len(df)
+    # One stable sort by (group, time) on integer keys; the frame itself is never reordered
+    keys = []
+    if time_column and time_column in df.columns:
+        keys.append(pd.to_datetime(df[time_column]).to_numpy().view(np.int64))
+    if group_column:
+        codes = pd.factorize(df[group_column])[0]
+        keys.append(codes)
+    order = np.lexsort(keys) if keys else np.arange(n_rows)
+    index = df.index[order]
+    values = df[metrics].to_numpy(dtype=np.float64)[order]
+
+    # Position of every row within its group, and where its group ends
+    if group_column:
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        lengths = np.diff(np.r_[starts, n_rows])
+        group_start = np.repeat(starts, lengths)
+        group_end = np.repeat(starts + lengths, lengths)
+    else:
+        group_start = np.zeros(n_rows, dtype=np.intp)
+        group_end = np.full(n_rows, n_rows, dtype=np.intp)
+    position = np.arange(n_rows) - group_start
+
+    # Per-group centering keeps the cumulative sums small when instances sit at different levels;
+    # missing values are filled with their group's mean, as preprocessing does
+    missing = np.isnan(values)
+    if group_column:
+        sums = np.add.reduceat(np.where(missing, 0, values), starts, axis=0)
+        group_mean = np.repeat(sums / np.add.reduceat(~missing, starts, axis=0), lengths, axis=0)
+    else:
+        group_mean = np.broadcast_to(np.nanmean(values, axis=0), values.shape)
+    values = np.where(missing, group_mean, values)
+
+    # All features go into one preallocated block, filled a statistic (all metrics) at a time
+    names = [f"{metric}_lag_{lag}" for lag in lags for metric in metrics]
+    names += [f"{metric}_{stat}_{window}" for window in windows for stat in ("mean", "std", "max", "slope")
+              for metric in metrics]
+    out = np.empty((n_rows, len(names)), dtype=dtype)
+    k = len(metrics)
+    column = 0
+    for lag in lags:
+        lagged = shift(values, lag)
+        lagged[position < lag] = np.nan
+        out[:, column:column + k] = lagged
+        column += k
+
+    for window in windows:
+        mean, std, slope = rolling_moments(values - group_mean, window)
+        mean += group_mean
+        maximum = rolling_max(values, window)
+        incomplete = position < window - 1
+        for stat in (mean, std, maximum, slope):
+            stat[incomplete] = np.nan
+            out[:, column:column + k] = stat
+            column += k
+
+    future = shift(df[[target]].to_numpy(dtype=np.float64)[order], -horizon)[:, 0]
+    future[np.arange(n_rows) + horizon >= group_end] = np.nan
+
+    if dropna:
+        keep = ~np.isnan(out).any(axis=1) & ~np.isnan(future)
+        out, future, index = out[keep], future[keep], index[keep]
+    features = pd.DataFrame(out, index=index, columns=names, copy=False)
+    future_target = pd.Series(future, index=index, name=f"{target}_in_{horizon}")
+    return features, future_target
+
+
+def shift(values, periods):
+    """
+    Shift rows down by `periods` (up when negative), filling with NaN.
+    """
+    shifted = np.full(values.shape, np.nan)
+    if periods > 0:
+        shifted[periods:] = values[:-periods]
+    elif periods < 0:
+        shifted[:periods] = values[-periods:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
+def _window_sums(cumulative, window):
+    # Sum over the `window` rows ending at each row, from a cumulative sum with a leading zero row
+    sums = np.full((len(cumulative) - 1,) + cumulative.shape[1:], np.nan)
+    sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def rolling_moments(values, window):
+    """
+    Trailing rolling mean, sample std and least-squares slope (per row) of every
+    column, from cumulative sums. Rows with fewer than `window` predecessors are NaN.
+    """
+    # Centering keeps the sums of squares and of t * x well conditioned
+    center = np.nanmean(values, axis=0)
+    centered = values - center
+    t = np.arange(len(values), dtype=np.float64)[:, None]
+    zeros = np.zeros((1, values.shape[1]))
+    sum_x = _window_sums(np.concatenate([zeros, np.cumsum(centered, axis=0)]), window)
+
+    mean = sum_x / window + center
+    if window == 1:
+        return mean, np.zeros_like(mean), np.zeros_like(mean)
+    sum_xx = _window_sums(np.concatenate([zeros, np.cumsum(centered ** 2, axis=0)]), window)
+    variance = np.maximum(sum_xx - sum_x ** 2 / window, 0) / (window - 1)
+    # Slope against time: sum((t - t_mean) * x) / sum((t - t_mean) ** 2) over the window
+    sum_tx = _window_sums(np.concatenate([zeros, np.cumsum(t * centered, axis=0)]), window)
+    t_mean = t - (window - 1) / 2
+    slope = (sum_tx - t_mean * sum_x) / (window * (window ** 2 - 1) / 12)
+    return mean, np.sqrt(variance), slope
+
+
+def rolling_max(values, window):
+    """
+    Trailing rolling max of every column in O(n) (van Herk / Gil-Werman): running
+    maxima forward and backward inside blocks of `window` rows, so each window is
+    the max of one suffix and one prefix.
+    """
+    n_rows, n_columns = values.shape
+    n_blocks = -(-n_rows // window)
+    padded = np.full((n_blocks * window, n_columns), -np.inf)
+    padded[:n_rows] = values
+    blocks = padded.reshape(n_blocks, window, n_columns)
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(-1, n_columns)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1, n_columns)
+    result = np.full((n_rows, n_columns), np.nan)
+    end = np.arange(window - 1, n_rows)
+    result[window - 1:] = np.maximum(suffix[end - window + 1], prefix[end])
+    return result
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def quantile_bins(values, n_bins):
+    """
+    Discretize a column into (at most) n_bins equal-frequency bins.
+    """
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    return np.searchsorted(edges, values, side="right")
+
+
+def stratified_sample(y, sample_size, n_strata=10, random_state=42):
+    """
+    Pick a fixed-size sample of row indices, stratified on quantiles of y so the
+    target distribution (including its tails) is preserved.
+    """
+    if sample_size is None or sample_size >= len(y):
+        return np.arange(len(y))
+
+    rng = np.random.default_rng(random_state)
+    strata = quantile_bins(y, n_strata)
+    counts = np.bincount(strata)
+    # Allocate the sample proportionally to stratum size, handing the rounding
+    # remainder to the strata with the largest fractional share
+    share = counts * sample_size / len(y)
+    quota = np.floor(share).astype(int)
+    remainder = sample_size - quota.sum()
+    quota[np.argsort(quota - share, kind="stable")[:remainder]] += 1
+    order = np.argsort(strata, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    indices = [rng.choice(order[start:start + count], size=q, replace=False)
+               for start, count, q in zip(starts, counts, quota) if q > 0]
+    return np.sort(np.concatenate(indices))
+
+
+def binned_mi(x_bins, y_bins):
+    """
+    Mutual information (nats) between two discretized variables from their joint
+    histogram, with the Miller-Madow bias correction so that independent features
+    score ~0 instead of (bins_x - 1)(bins_y - 1) / 2N.
+    """
+    n = len(x_bins)
+    n_y = y_bins.max() + 1
+    joint = np.bincount(x_bins * n_y + y_bins).astype(np.float64)
+    joint = joint[joint > 0]
+    p_x = np.bincount(x_bins).astype(np.float64)
+    p_x = p_x[p_x > 0]
+    p_y = np.bincount(y_bins).astype(np.float64)
+    p_y = p_y[p_y > 0]
+
+    def entropy(counts):
+        p = counts / n
+        return -np.sum(p * np.log(p))
+
+    mi = entropy(p_x) + entropy(p_y) - entropy(joint)
+    mi -= (len(joint) - len(p_x) - len(p_y) + 1) / (2 * n)
+    return max(mi, 0.0)
+
+
+_worker_y_bins = None
+
+
+def _init_worker(y_bins):
+    global _worker_y_bins
+    _worker_y_bins = y_bins
+
+
+def _score_feature(column, n_bins):
+    return binned_mi(quantile_bins(column, n_bins), _worker_y_bins)
+
+
+def binned_mutual_info(X, y, n_bins=None, sample_size=200_000, random_state=42, n_jobs=None):
+    """
+    Fast replacement for sklearn's mutual_info_regression.
+
+    Scores each feature with a histogram MI estimate on a fixed-size sample
+    stratified on y, so the cost is O(sample_size) per feature instead of a kNN
+    search over every row. Features are scored in a process pool when n_jobs > 1.
+    The result is deterministic for a given random_state.
+
+    n_bins defaults to sqrt(n_rows / 10), clipped to [4, 32], which keeps about
+    ten rows per joint-histogram cell; with sparser histograms the bias
+    correction breaks down and independent features score above 0.01.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    rows = stratified_sample(y, sample_size, random_state=random_state)
+    if len(rows) < len(y):
+        X = X[rows]
+        y = y[rows]
+    if n_bins is None:
+        n_bins = int(np.clip(np.sqrt(len(y) / 10), 4, 32))
+    y_bins = quantile_bins(y, n_bins)
+
+    columns = [np.ascontiguousarray(X[:, j]) for j in range(X.shape[1])]
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if not n_jobs or n_jobs == 1 or len(columns) < 2:
+        _init_worker(y_bins)
+        return np.array([_score_feature(column, n_bins) for column in columns])
+
+    # Each worker receives the binned target once; tasks only carry their own column
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(y_bins,)) as executor:
+        scores = executor.map(_score_feature, columns, [n_bins] * len(columns))
+        return np.array(list(scores))
@@ -0,0 +1,275 @@
+import itertools
+import math
+import os
+import time
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from resource import RUSAGE_CHILDREN, getrusage
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import f1_score, mean_squared_error
+
+from scripts import anomaly_detection
+
+# Grids searched by default; any subset of the estimator's parameters works
+REGRESSOR_SPACE = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [None, 5, 10, 20],
+    "min_samples_leaf": [1, 2, 5, 10],
+    "max_features": [1.0, 0.5, "sqrt"],
+}
+ANOMALY_SPACE = {
+    "contamination": [0.01, 0.02, 0.05, 0.1, 0.15],
+    "n_estimators": [50, 100, 200, 400],
+    "max_samples": ["auto", 128, 512, 1024],
+}
+
+
+def search_hyperparameters(X, y, model_type="regressor", param_space=None, method="hyperband", eta=3,
+                           min_resource=None, time_budget=300.0, cpu_budget=None, validation_fraction=0.2,
+                           max_validation_rows=20_000, n_jobs=-1, random_state=42):
+    """
+    Tune the predictive maintenance regressor (model_type="regressor", y = error rate)
+    or the anomaly Isolation Forest (model_type="anomaly", y = 1/True for known
+    anomalies) with successive halving, where the resource is the number of
+    training rows.
+
+    The validation split is made once, the training rows are shuffled once and a
+    candidate at resource r trains on the first r of them, so every rung reuses the
+    same nested subsamples. At most max_validation_rows of the held-out rows are
+    used for scoring, since predicting them dominates the cost of small rungs.
+    The split lives in shared memory and candidates are
+    trained in a process pool. method="hyperband" runs every bracket, from many
+    candidates on few rows to a few candidates on all rows; method="halving" runs
+    only the most aggressive bracket.
+
+    Stops launching candidates once time_budget wall-clock seconds or cpu_budget
+    CPU seconds (parent plus pool workers, including candidates stopped at a
+    deadline) are spent. Both budgets are shared evenly across brackets and rungs;
+    a rung's CPU share becomes a wall-clock deadline assuming all of its workers
+    are busy. A rung that runs out of its share stops its running candidates and
+    promotes from the ones it managed to score.
+    Workers send back only scores, plus the fitted model on full-data rungs, where
+    the parent keeps the best one. If the best candidate never reached the full
+    training set, it is refit there at the end when the cost estimated from its
+    last fit still fits in the budget, otherwise on the rows it was scored on,
+    which reproduces the model the search evaluated.
+    Returns (best_model, results), where results has one row per evaluated
+    (candidate, resource) with the validation score (negative MSE for the
+    regressor, F1 on the anomaly class for the Isolation Forest), sorted best first.
+    """
+    if model_type not in ("regressor", "anomaly"):
+        raise ValueError(f"Unknown model_type {model_type!r}, expected 'regressor' or 'anomaly'")
+    if method not in ("hyperband", "halving"):
+        raise ValueError(f"Unknown method {method!r}, expected 'hyperband' or 'halving'")
+    if param_space is None:
+        param_space = REGRESSOR_SPACE if model_type == "regressor" else ANOMALY_SPACE
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+
+    # Cached split: validation rows first, then the training rows in a fixed random order
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(len(X))
+    n_held_out = max(1, int(len(X) * validation_fraction))
+    n_validation = min(n_held_out, max_validation_rows)
+    n_train = len(X) - n_held_out
+    # Held-out rows beyond max_validation_rows are simply not used
+    order = np.concatenate([order[:n_validation], order[n_held_out:]])
+    min_resource = min_resource or min(n_train, max(256, n_train // 81))
+
+    names = list(param_space)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*(param_space[name] for name in names))]
+    rng.shuffle(candidates)
+    brackets = _hyperband_brackets(n_train, min_resource, eta)
+    if method == "halving":
+        brackets = brackets[:1]
+    budgets = [f"{time_budget}s wall clock" if time_budget is not None else None,
+               f"{cpu_budget} CPU seconds" if cpu_budget is not None else None]
+    print(f"Searching {len(candidates)} {model_type} configurations on {n_train} training rows "
+          f"({len(brackets)} brackets, eta={eta}, budget: {', '.join(b for b in budgets if b) or 'none'})...")
+
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    shape = (len(order), X.shape[1])
+    x_bytes = shape[0] * shape[1] * 8
+    shm = shared_memory.SharedMemory(create=True, size=max(x_bytes + shape[0] * 8, 1))
+    try:
+        shared_X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        shared_y = np.ndarray(shape[:1], dtype=np.float64, buffer=shm.buf, offset=x_bytes)
+        shared_X[:] = X[order]
+        shared_y[:] = y[order]
+        del shared_X, shared_y
+
+        settings = dict(shm_name=shm.name, X_shape=shape, y_offset=x_bytes, n_validation=n_validation,
+                        n_train=n_train, model_type=model_type)
+        rows = []
+        best = None  # (score, resource, params, fit_seconds, model or None below the full training set)
+        # CPU of pool workers: all of it for finished pools, finished candidates for the running one
+        worker_cpu = 0.0
+        start_children_cpu = _children_cpu()
+        next_candidate = 0
+        for bracket, (n_candidates, s) in enumerate(brackets):
+            # Brackets draw fresh configurations, cycling through the grid if it is small
+            bracket_candidates = [candidates[(next_candidate + i) % len(candidates)]
+                                  for i in range(min(n_candidates, len(candidates)))]
+            next_candidate += len(bracket_candidates)
+            # Split both budgets evenly between brackets and, within a bracket, between
+            # rungs (each rung costs about the same); unused time carries over
+            bracket_start = time.perf_counter()
+            bracket_start_cpu = _cpu_spent(start_cpu, worker_cpu)
+            bracket_deadline = bracket_cpu_deadline = None
+            if time_budget is not None:
+                bracket_deadline = start_time + time_budget * (bracket + 1) / len(brackets)
+            if cpu_budget is not None:
+                bracket_cpu_deadline = cpu_budget * (bracket + 1) / len(brackets)
+            rung = 0
+            resource = _rung_resource(n_train, eta, s, rung)
+            while bracket_candidates:
+                if _budget_spent(start_time, start_cpu, worker_cpu, time_budget, cpu_budget):
+                    break
+                n_workers = min(n_jobs, len(bracket_candidates))
+                rung_start = time.perf_counter()
+                rung_deadline = None
+                if bracket_deadline is not None:
+                    rung_deadline = bracket_start + (bracket_deadline - bracket_start) * (rung + 1) / (s + 1)
+                if bracket_cpu_deadline is not None:
+                    rung_cpu = bracket_start_cpu + (bracket_cpu_deadline - bracket_start_cpu) * (rung + 1) / (s + 1)
+                    # n_workers busy workers spend at most n_workers CPU seconds per second
+                    cpu_deadline = rung_start + max(rung_cpu - _cpu_spent(start_cpu, worker_cpu), 0) / n_workers
+                    rung_deadline = cpu_deadline if rung_deadline is None else min(rung_deadline, cpu_deadline)
+                scored = []
+                finished = queue.SimpleQueue()
+                # A pool per rung: leaving the block terminates candidates still running past the deadline
+                with multiprocessing.Pool(n_workers, initializer=_init_worker, initargs=(settings,)) as pool:
+                    for params in bracket_candidates:
+                        pool.apply_async(_evaluate_candidate, ((params, resource, resource >= n_train),),
+                                         callback=finished.put,
+                                         error_callback=finished.put)
+                    for _ in bracket_candidates:
+                        remaining = None if rung_deadline is None else max(rung_deadline - time.perf_counter(), 0)
+                        try:
+                            result = finished.get(timeout=remaining)
+                        except queue.Empty:
+                            break
+                        if isinstance(result, BaseException):
+                            raise result
+                        params, score, fit_seconds, cpu_seconds, model = result
+                        worker_cpu += cpu_seconds
+                        scored.append((score, params))
+                        rows.append({"bracket": bracket, "rung": rung, "n_rows": resource, **params,
+                                     "score": score, "fit_seconds": fit_seconds, "cpu_seconds": cpu_seconds})
+                        # Prefer results on more rows; a full-data model is returned as-is
+                        if best is None or (resource, score) > (best[1], best[0]):
+                            best = (score, resource, params, fit_seconds, model)
+                        if _budget_spent(start_time, start_cpu, worker_cpu, time_budget, cpu_budget):
+                            break
+                # The pool's workers have been reaped: count all of their CPU, killed candidates included
+                worker_cpu = _children_cpu() - start_children_cpu
+
+                # Keep the best 1/eta on eta times as many rows; a rung cut short by its
+                # deadline promotes from the candidates it managed to score
+                if resource >= n_train or not scored:
+                    break
+                scored.sort(key=lambda item: item[0], reverse=True)
+                bracket_candidates = [params for _, params in scored[:max(1, len(scored) // eta)]]
+                rung += 1
+                resource = _rung_resource(n_train, eta, s, rung)
+            if _budget_spent(start_time, start_cpu, worker_cpu, time_budget, cpu_budget):
+                print("Search budget spent, stopping early")
+                break
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if best is None:
+        raise RuntimeError("No candidate finished within the search budget")
+    results = pd.DataFrame(rows).sort_values(["n_rows", "score"], ascending=False, ignore_index=True)
+    score, resource, params, fit_seconds, model = best
+    if model is None:
+        # Best candidate never reached the full training set: refit it there if the budget allows
+        fit_rows = n_train
+        refit_seconds = fit_seconds * n_train / resource
+        if _budget_spent(start_time, start_cpu, worker_cpu, time_budget, cpu_budget, reserve=refit_seconds):
+            print(f"Not enough budget left to refit on all {n_train} rows (~{refit_seconds:.0f}s), "
+                  f"refitting on the {resource} rows it was scored on")
+            fit_rows = resource
+        else:
+            print(f"Refitting the best configuration on all {n_train} training rows...")
+        train_rows = order[n_validation:n_validation + fit_rows]
+        model = _build_model(model_type, params).fit(X[train_rows], y[train_rows] if model_type == "regressor" else None)
+    elapsed = time.perf_counter() - start_time
+    cpu_seconds = _cpu_spent(start_cpu, worker_cpu)
+    print(f"Evaluated {len(results)} candidate fits in {elapsed:.1f}s ({cpu_seconds:.1f} CPU seconds)")
+    print(f"Best {model_type} parameters: {params} (score {score:.4f} on {resource} rows)")
+    return model, results
+
+
+def _hyperband_brackets(max_resource, min_resource, eta):
+    # (number of candidates, number of halvings) per bracket, most aggressive first
+    s_max = max(0, int(math.floor(math.log(max_resource / min_resource, eta) + 1e-9)))
+    return [(int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), s) for s in range(s_max, -1, -1)]
+
+
+def _rung_resource(max_resource, eta, s, rung):
+    # Rows used at a rung; the last rung (rung == s) always uses every training row
+    return max(1, int(max_resource * eta ** (rung - s)))
+
+
+def _children_cpu():
+    # CPU seconds of reaped child processes, including pool workers terminated mid-fit
+    usage = getrusage(RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _cpu_spent(start_cpu, worker_cpu):
+    return time.process_time() - start_cpu + worker_cpu
+
+
+def _budget_spent(start_time, start_cpu, worker_cpu, time_budget, cpu_budget, reserve=0.0):
+    if time_budget is not None and time.perf_counter() - start_time + reserve >= time_budget:
+        return True
+    return cpu_budget is not None and _cpu_spent(start_cpu, worker_cpu) + reserve >= cpu_budget
+
+
+def _build_model(model_type, params):
+    if model_type == "regressor":
+        return RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    return anomaly_detection.build_anomaly_detection_model(**params)
+
+
+_worker_settings = None
+_worker_shm = None
+
+
+def _init_worker(settings):
+    global _worker_settings, _worker_shm
+    _worker_settings = settings
+    _worker_shm = shared_memory.SharedMemory(name=settings["shm_name"])
+
+
+def _evaluate_candidate(task):
+    params, resource, return_model = task
+    settings = _worker_settings
+    start_time = time.perf_counter()
+    start_cpu = time.process_time()
+    X = np.ndarray(settings["X_shape"], dtype=np.float64, buffer=_worker_shm.buf)
+    y = np.ndarray(settings["X_shape"][:1], dtype=np.float64, buffer=_worker_shm.buf, offset=settings["y_offset"])
+    n_validation = settings["n_validation"]
+    X_val, y_val = X[:n_validation], y[:n_validation]
+    X_train, y_train = X[n_validation:n_validation + resource], y[n_validation:n_validation + resource]
+
+    model = _build_model(settings["model_type"], params)
+    if settings["model_type"] == "regressor":
+        model.fit(X_train, y_train)
+        score = -mean_squared_error(y_val, model.predict(X_val))
+    else:
+        model.fit(X_train)
+        score = f1_score(y_val > 0, model.predict(X_val) == -1, zero_division=0)
+    del X, y, X_val, y_val, X_train, y_train
+    # Forests are pickled back only from full-data rungs; below that the parent refits the winner
+    return (params, score, time.perf_counter() - start_time, time.process_time() - start_cpu,
+            model if return_model else None)
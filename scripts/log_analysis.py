@@ -1,35 +1,145 @@
-<<<<<<< HEAD
+import gc
+import glob
+import json
+import multiprocessing
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from collections import Counter
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.pipeline import make_pipeline
 import matplotlib.pyplot as plt
 import joblib
 import os
+import time
+
+from scripts.log_templates import TemplateMiner
+
+
+# "<timestamp> - <LEVEL> - <message>", as written by Generate_logs.py; lines without the
+# prefix are kept whole as the message
+LOG_LINE_PATTERN = re.compile(r"^(?:(\d\d\d\d-\d\d-\d\d[ T][\d:.]+) - ([A-Z]+) - )?([^\r\n]*)", re.MULTILINE)
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+LOG_BATCH_SIZE = 65536
+
+
+def stream_logs(log_file, batch_size=LOG_BATCH_SIZE, block_size=READ_BLOCK_SIZE):
+    """
+    Parse a log file into batches of structured records, in constant memory.
+
+    The file is read in blocks of block_size bytes; each block is parsed up to its
+    last newline with one precompiled regex pass and the partial line is carried to
+    the next block. Yields dicts of batch_size records (the last one may be
+    shorter): "timestamp" (datetime64[us] array, NaT where missing), "level"
+    (string array, "" where missing) and "message" (list of str).
+    """
+    timestamps, levels, messages = [], [], []
+    with open(log_file, "rb") as file:
+        tail = b""
+        while True:
+            block = file.read(block_size)
+            if block:
+                block = tail + block
+                end = block.rfind(b"\n")
+                if end < 0:
+                    tail = block
+                    continue
+                tail = block[end + 1:]
+                block = block[:end]
+            else:
+                # Last line, if the file does not end with a newline
+                if not tail:
+                    break
+                block, tail = tail, b""
+            text = block.decode("utf-8", errors="replace")
+            block_timestamps, block_levels, block_messages = _parse_block(text)
+            timestamps.extend(block_timestamps)
+            levels.extend(block_levels)
+            messages.extend(block_messages)
+            while len(messages) >= batch_size:
+                yield _log_batch(timestamps[:batch_size], levels[:batch_size], messages[:batch_size])
+                del timestamps[:batch_size], levels[:batch_size], messages[:batch_size]
+    if messages:
+        yield _log_batch(timestamps, levels, messages)
+
+
+def parse_log_text(text):
+    """
+    Parse complete log lines (a str) into one structured batch, as stream_logs yields.
+    """
+    if not text:
+        return _log_batch([], [], [])
+    timestamps, levels, messages = _parse_block(text)
+    return _log_batch(timestamps, levels, list(messages))
+
+
+def _parse_block(text):
+    # The per-line tuples hold only strings, so they can never form reference cycles;
+    # pausing the cyclic GC while they exist avoids collections that would repeatedly
+    # walk tens of thousands of fresh tuples
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return tuple(zip(*LOG_LINE_PATTERN.findall(text)))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _log_batch(timestamps, levels, messages):
+    return {
+        "timestamp": np.array(timestamps, dtype="datetime64[us]"),
+        "level": np.array(levels, dtype=str),
+        "message": messages,
+    }
 
 
 def preprocess_logs(log_file):
     """
-    Preprocess log messages by removing timestamps and special characters.
+    Preprocess log messages by removing timestamps and log levels.
     """
-    with open(log_file, "r") as file:
-        logs = file.readlines()
-    processed_logs = [re.sub(r"\d{4}-\d{2}-\d{2}.*- ", "", log.strip()) for log in logs]
+    processed_logs = []
+    for batch in stream_logs(log_file):
+        processed_logs.extend(batch["message"])
     return processed_logs
 
 
-def categorize_logs(processed_logs, num_clusters=3):
+def categorize_logs(processed_logs, num_clusters=3, use_templates=True):
     """
     Categorize log messages using TF-IDF and KMeans clustering, and save models.
+
+    With use_templates=True the lines are first collapsed into templates by a
+    TemplateMiner, and TF-IDF and KMeans run on the unique templates weighted by
+    their line counts (document frequencies included), so the cost grows with the
+    number of templates instead of the number of lines. Each line gets the cluster
+    of its template. The miner is saved next to the models.
     """
     # TF-IDF Vectorizer
     vectorizer = TfidfVectorizer(stop_words="english")
-    X = vectorizer.fit_transform(processed_logs)
-    
+    if use_templates:
+        miner = TemplateMiner()
+        template_ids = miner.add_many(processed_logs)
+        documents, weights = miner.templates, miner.counts
+        print(f"Collapsed {len(processed_logs)} log lines into {len(documents)} templates")
+        vectorizer.fit(documents)
+        # Document frequencies as if every line had been vectorized
+        present = (vectorizer.transform(documents) > 0).astype(np.float64)
+        doc_freq = present.T @ weights
+        vectorizer.idf_ = np.log((1 + weights.sum()) / (1 + doc_freq)) + 1
+    else:
+        documents, weights = processed_logs, None
+        vectorizer.fit(documents)
+    X = vectorizer.transform(documents)
+
     # KMeans Clustering
-    kmeans = KMeans(n_clusters=num_clusters, random_state=42)
-    kmeans.fit(X)
+    kmeans = KMeans(n_clusters=min(num_clusters, X.shape[0]), random_state=42)
+    kmeans.fit(X, sample_weight=weights)
     log_clusters = kmeans.predict(X)
-    
+    if use_templates:
+        log_clusters = log_clusters[template_ids]
+
     # Save the TF-IDF vectorizer
     tfidf_vectorizer_path = "./models/tfidf_vectorizer.pkl"
     os.makedirs("./models", exist_ok=True)
@@ -41,118 +151,239 @@ def categorize_logs(processed_logs, num_clusters=3):
     print(f"Saving log clustering model to {log_clustering_model_path}...")
     joblib.dump(kmeans, log_clustering_model_path)
 
+    if use_templates:
+        # Save the template miner, to map new lines to templates with a tree lookup
+        template_miner_path = "./models/log_template_miner.pkl"
+        print(f"Saving log template miner to {template_miner_path}...")
+        joblib.dump(miner, template_miner_path)
+
     return log_clusters, processed_logs
 
 
-def visualize_clusters(log_clusters, processed_logs, num_clusters):
+def categorize_logs_online(log_batches, num_clusters=3, n_features=2 ** 18, checkpoint_every=10,
+                           model_dir="./models", resume=True):
     """
-    Visualize and save log messages by cluster.
+    Cluster log messages online, in constant memory, with a stateless
+    HashingVectorizer and a MiniBatchKMeans updated by partial_fit per batch.
+
+    log_batches is a log file path (read with stream_logs) or an iterable of lists
+    of messages. Nothing is kept between batches except the cluster centers, so
+    throughput and memory do not depend on how many lines have been seen. The
+    model is checkpointed to model_dir every checkpoint_every batches and at the
+    end (written to a temporary file and renamed, so readers never see a partial
+    file); with resume=True an existing checkpoint with the same settings is
+    updated instead of starting over. The Lambda log_clustering handler loads the
+    same two files. Returns (kmeans, cluster_counts), the counts being the lines
+    assigned to each cluster in this run.
     """
-    os.makedirs("./visualizations", exist_ok=True)
+    if isinstance(log_batches, str):
+        log_batches = (batch["message"] for batch in stream_logs(log_batches))
+    os.makedirs(model_dir, exist_ok=True)
+    vectorizer_path = os.path.join(model_dir, "log_hashing_vectorizer.pkl")
+    model_path = os.path.join(model_dir, "log_online_clustering_model.pkl")
 
-    # Print clusters to console
-    for i in range(num_clusters):
-        print(f"Cluster {i} Logs:")
-        for idx, log in enumerate(processed_logs):
-            if log_clusters[idx] == i:
-                print(log)
-        print()
+    vectorizer = HashingVectorizer(n_features=n_features, stop_words="english", alternate_sign=False)
+    kmeans = None
+    if resume and os.path.exists(model_path) and os.path.exists(vectorizer_path):
+        kmeans = joblib.load(model_path)
+        if kmeans.n_clusters != num_clusters or joblib.load(vectorizer_path).n_features != n_features:
+            print(f"Ignoring checkpoint {model_path}: it was trained with other settings")
+            kmeans = None
+        else:
+            print(f"Resuming online log clustering from {model_path}...")
+    if kmeans is None:
+        kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=42, n_init=1)
+    joblib.dump(vectorizer, vectorizer_path)
 
-    # Save the cluster visualization plot
-    plt.figure(figsize=(10, 6))
-    plt.hist(log_clusters, bins=num_clusters, color="blue", edgecolor="black")
-    plt.title("Log Clusters Distribution")
-    plt.xlabel("Cluster ID")
-    plt.ylabel("Number of Logs")
-    output_path = "./visualizations/log_clusters_visualization.png"
-    print(f"Saving log clusters visualization to {output_path}...")
-    plt.savefig(output_path)
+    cluster_counts = np.zeros(num_clusters, dtype=np.int64)
+    # Lines not used in an update yet, counted per distinct line: repeated lines are
+    # vectorized once and weighted by their count
+    pending = Counter()
+    n_lines = n_batches = 0
+    start_time = time.perf_counter()
+    for messages in log_batches:
+        pending.update(messages)
+        # The first update needs at least one distinct line per cluster
+        if not hasattr(kmeans, "cluster_centers_") and len(pending) < num_clusters:
+            continue
+        weights = np.fromiter(pending.values(), dtype=np.float64, count=len(pending))
+        X = vectorizer.transform(list(pending))
+        kmeans.partial_fit(X, sample_weight=weights)  # Also labels the batch against the updated centers
+        cluster_counts += np.bincount(kmeans.labels_, weights=weights, minlength=num_clusters).astype(np.int64)
+        n_lines += int(weights.sum())
+        n_batches += 1
+        pending = Counter()
+        if n_batches % checkpoint_every == 0:
+            _save_checkpoint(kmeans, model_path)
+            print(f"Clustered {n_lines} lines ({n_lines / (time.perf_counter() - start_time):.0f} lines/s), "
+                  f"checkpoint saved to {model_path}")
+    if pending:
+        print(f"Skipping the last {sum(pending.values())} lines: fewer than {num_clusters} distinct lines in total")
+    if hasattr(kmeans, "cluster_centers_"):
+        _save_checkpoint(kmeans, model_path)
+        print(f"Online log clustering saved to {model_path} after {n_lines} lines")
+    return kmeans, cluster_counts
 
 
-def save_clustered_logs(log_clusters, processed_logs, output_file="../data/log_clusters.txt"):
-    """
-    Save categorized logs into a file grouped by clusters.
-    """
-    # Ensure the parent directory exists
-    data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data")
-    os.makedirs(data_folder, exist_ok=True)
-    
-    # Full file path
-    output_file = os.path.join(data_folder, "log_clusters.txt")
-    
-    # Save the logs to the specified file
-    with open(output_file, "w") as file:
-        for cluster in range(max(log_clusters) + 1):
-            file.write(f"Cluster {cluster} Logs:\n")
-            for idx, log in enumerate(processed_logs):
-                if log_clusters[idx] == cluster:
-                    file.write(f"- {log}\n")
-            file.write("\n")
-
-    print(f"Clustered logs saved to {output_file}")
-=======
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-import matplotlib.pyplot as plt
-import joblib
-import os
+def _save_checkpoint(model, path):
+    temporary_path = path + ".tmp"
+    joblib.dump(model, temporary_path)
+    os.replace(temporary_path, path)
 
 
-def preprocess_logs(log_file):
+def analyze_log_files(paths, num_clusters=3, n_jobs=-1, n_features=2 ** 18, model_dir="./models"):
     """
-    Preprocess log messages by removing timestamps and special characters.
+    Cluster the logs of many files (e.g. one per instance per hour) in parallel.
+
+    paths is a directory (every *.log in it), a glob pattern or a list of files.
+    Each worker process streams one file at a time (largest first), collapses its
+    lines into templates with a TemplateMiner and hashes the templates with a
+    stateless HashingVectorizer, so workers need no shared vocabulary and return
+    only their templates, counts and sparse rows. The parent merges identical
+    templates across files, computes count-weighted IDF and fits one KMeans on the
+    merged templates weighted by count; files are never read twice. The fitted
+    vectorizer (hashing + IDF) and KMeans are saved to model_dir and expose
+    transform/predict like the other log clustering models.
+    Returns (kmeans, file_stats, templates): per-file lines, bytes, seconds,
+    lines/s and lines per cluster, and every merged template with its count and
+    cluster. An empty list of files returns (None, empty, empty) without fitting.
     """
-    with open(log_file, "r") as file:
-        logs = file.readlines()
-    processed_logs = [re.sub(r"\d{4}-\d{2}-\d{2}.*- ", "", log.strip()) for log in logs]
-    return processed_logs
+    if isinstance(paths, str):
+        pattern = os.path.join(paths, "*.log") if os.path.isdir(paths) else paths
+        paths = glob.glob(pattern)
+        if not paths:
+            raise FileNotFoundError(f"No log files match {pattern}")
+    if not paths:
+        print("No log files to analyze")
+        return (None, pd.DataFrame(columns=["path", "lines", "bytes", "seconds", "lines_per_second"]),
+                pd.DataFrame(columns=["template", "count", "cluster"]))
+    # Largest files first, so a big file does not start last and hold up the pool
+    paths = sorted(paths, key=os.path.getsize, reverse=True)
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    print(f"Analyzing {len(paths)} log files with {min(n_jobs, len(paths))} worker processes...")
 
+    start_time = time.perf_counter()
+    file_results = []
+    with multiprocessing.Pool(min(n_jobs, len(paths))) as pool:
+        for result in pool.imap_unordered(_analyze_log_file, [(path, n_features) for path in paths]):
+            path, n_lines, n_bytes, seconds = result[:4]
+            print(f"  {path}: {n_lines} lines, {len(result[4])} templates in {seconds:.2f}s "
+                  f"({n_lines / max(seconds, 1e-9):,.0f} lines/s)")
+            file_results.append(result)
+    parse_seconds = time.perf_counter() - start_time
 
-def categorize_logs(processed_logs, num_clusters=3):
-    """
-    Categorize log messages using TF-IDF and KMeans clustering, and save models.
-    """
-    # TF-IDF Vectorizer
-    vectorizer = TfidfVectorizer(stop_words="english")
-    X = vectorizer.fit_transform(processed_logs)
-    
-    # KMeans Clustering
-    kmeans = KMeans(n_clusters=num_clusters, random_state=42)
-    kmeans.fit(X)
-    log_clusters = kmeans.predict(X)
-    
-    # Save the TF-IDF vectorizer
-    tfidf_vectorizer_path = "./models/tfidf_vectorizer.pkl"
-    os.makedirs("./models", exist_ok=True)
-    print(f"Saving TF-IDF vectorizer to {tfidf_vectorizer_path}...")
-    joblib.dump(vectorizer, tfidf_vectorizer_path)
+    # Merge identical templates across files; each file keeps its template -> merged row map
+    merged = {}
+    sources = []  # (file, row) of the first occurrence of every merged template
+    file_rows = []
+    for file_index, (_, _, _, _, templates, _, _) in enumerate(file_results):
+        rows = np.empty(len(templates), dtype=np.int64)
+        for row, template in enumerate(templates):
+            merged_row = merged.get(template)
+            if merged_row is None:
+                merged_row = merged[template] = len(sources)
+                sources.append((file_index, row))
+            rows[row] = merged_row
+        file_rows.append(rows)
+    weights = np.zeros(len(sources))
+    for rows, result in zip(file_rows, file_results):
+        np.add.at(weights, rows, result[5])
+    if not sources:
+        raise ValueError("The log files contain no lines")
+    offsets = np.cumsum([0] + [len(result[4]) for result in file_results])
+    hashed = sparse.vstack([result[6] for result in file_results]).tocsr()
+    hashed = hashed[[offsets[file_index] + row for file_index, row in sources]]
 
-    # Save the clustering model
-    log_clustering_model_path = "./models/log_clustering_model.pkl"
-    print(f"Saving log clustering model to {log_clustering_model_path}...")
-    joblib.dump(kmeans, log_clustering_model_path)
+    # TF-IDF over the hashed features, document frequencies weighted as if every line was vectorized
+    transformer = TfidfTransformer().fit(hashed)
+    doc_freq = (hashed > 0).astype(np.float64).T @ weights
+    # Hash buckets no template uses (e.g. numbers in raw lines at prediction time) get zero
+    # weight, as out-of-vocabulary words do with TfidfVectorizer
+    transformer.idf_ = np.where(doc_freq > 0, np.log((1 + weights.sum()) / (1 + doc_freq)) + 1, 0)
+    X = transformer.transform(hashed)
+    kmeans = KMeans(n_clusters=min(num_clusters, X.shape[0]), random_state=42)
+    kmeans.fit(X, sample_weight=weights)
+    elapsed = time.perf_counter() - start_time
+
+    file_stats = pd.DataFrame({
+        "path": [result[0] for result in file_results],
+        "lines": [result[1] for result in file_results],
+        "bytes": [result[2] for result in file_results],
+        "seconds": [result[3] for result in file_results],
+    })
+    file_stats["lines_per_second"] = file_stats["lines"] / file_stats["seconds"].clip(lower=1e-9)
+    per_cluster = np.array([np.bincount(kmeans.labels_[rows], weights=result[5], minlength=kmeans.n_clusters)
+                            for rows, result in zip(file_rows, file_results)], dtype=np.int64)
+    for cluster in range(kmeans.n_clusters):
+        file_stats[f"cluster_{cluster}"] = per_cluster[:, cluster]
+    templates = pd.DataFrame({"template": list(merged), "count": weights.astype(np.int64),
+                              "cluster": kmeans.labels_}).sort_values("count", ascending=False, ignore_index=True)
+
+    total_lines = file_stats["lines"].sum()
+    total_mib = file_stats["bytes"].sum() / 2 ** 20
+    print(f"Parsed {total_lines} lines ({total_mib:.0f} MiB) from {len(paths)} files in {parse_seconds:.2f}s: "
+          f"{total_lines / parse_seconds:,.0f} lines/s, {total_mib / parse_seconds:.1f} MiB/s")
+    print(f"Clustered {len(templates)} merged templates; {elapsed:.2f}s in total")
+
+    os.makedirs(model_dir, exist_ok=True)
+    vectorizer_path = os.path.join(model_dir, "log_files_vectorizer.pkl")
+    model_path = os.path.join(model_dir, "log_files_clustering_model.pkl")
+    print(f"Saving log vectorizer to {vectorizer_path} and clustering model to {model_path}...")
+    joblib.dump(make_pipeline(_hashing_vectorizer(n_features), transformer), vectorizer_path)
+    joblib.dump(kmeans, model_path)
+    return kmeans, file_stats, templates
+
+
+def _hashing_vectorizer(n_features):
+    # Raw term counts; IDF weighting and normalization are applied after merging
+    return HashingVectorizer(n_features=n_features, stop_words="english", alternate_sign=False, norm=None)
 
-    return log_clusters, processed_logs
 
+def _analyze_log_file(task):
+    path, n_features = task
+    start_time = time.perf_counter()
+    miner = TemplateMiner()
+    n_lines = 0
+    for batch in stream_logs(path):
+        miner.add_many(batch["message"])
+        n_lines += len(batch["message"])
+    templates = miner.templates
+    hashed = _hashing_vectorizer(n_features).transform(templates)
+    return path, n_lines, os.path.getsize(path), time.perf_counter() - start_time, templates, miner.counts, hashed
 
-def visualize_clusters(log_clusters, processed_logs, num_clusters):
+
+def group_by_cluster(log_clusters, num_clusters=None):
+    """
+    Group line indices by cluster in one pass: returns (order, counts, starts), where
+    order[starts[c]:starts[c] + counts[c]] are the lines of cluster c in input order.
+    """
+    log_clusters = np.asarray(log_clusters)
+    counts = np.bincount(log_clusters, minlength=num_clusters or 0)
+    order = np.argsort(log_clusters, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return order, counts, starts
+
+
+def visualize_clusters(log_clusters, processed_logs, num_clusters, max_examples=5):
     """
     Visualize and save log messages by cluster.
+    Prints each cluster's size and first max_examples lines rather than every line.
     """
     os.makedirs("./visualizations", exist_ok=True)
+    order, counts, starts = group_by_cluster(log_clusters, num_clusters)
 
     # Print clusters to console
     for i in range(num_clusters):
-        print(f"Cluster {i} Logs:")
-        for idx, log in enumerate(processed_logs):
-            if log_clusters[idx] == i:
-                print(log)
+        print(f"Cluster {i} Logs ({counts[i]} lines):")
+        for idx in order[starts[i]:starts[i] + min(counts[i], max_examples)]:
+            print(processed_logs[idx])
+        if counts[i] > max_examples:
+            print(f"... {counts[i] - max_examples} more")
         print()
 
     # Save the cluster visualization plot
     plt.figure(figsize=(10, 6))
-    plt.hist(log_clusters, bins=num_clusters, color="blue", edgecolor="black")
+    plt.bar(np.arange(len(counts)), counts, width=1.0, color="blue", edgecolor="black")
     plt.title("Log Clusters Distribution")
     plt.xlabel("Cluster ID")
     plt.ylabel("Number of Logs")
@@ -161,9 +392,10 @@ def visualize_clusters(log_clusters, processed_logs, num_clusters):
     plt.savefig(output_path)
 
 
-def save_clustered_logs(log_clusters, processed_logs, output_file="../data/log_clusters.txt"):
+def save_clustered_logs(log_clusters, processed_logs, output_file="../data/log_clusters.txt", page_size=1000):
     """
-    Save categorized logs into a file grouped by clusters.
+    Save categorized logs into a file grouped by clusters, plus its page index
+    (log_clusters_index.jsonl, see write_grouped_logs).
     """
     # Ensure the parent directory exists
     data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data")
@@ -171,15 +403,55 @@ def save_clustered_logs(log_clusters, processed_logs, output_file="../data/log_c
     
     # Full file path
     output_file = os.path.join(data_folder, "log_clusters.txt")
-    
+    index_file = os.path.join(data_folder, "log_clusters_index.jsonl")
+
     # Save the logs to the specified file
-    with open(output_file, "w") as file:
-        for cluster in range(max(log_clusters) + 1):
-            file.write(f"Cluster {cluster} Logs:\n")
-            for idx, log in enumerate(processed_logs):
-                if log_clusters[idx] == cluster:
-                    file.write(f"- {log}\n")
-            file.write("\n")
-
-    print(f"Clustered logs saved to {output_file}")
->>>>>>> c5178ecea56ca2ecd0ef0b4b7d463a93e55be81a
+    write_grouped_logs(log_clusters, processed_logs, output_file, index_file, page_size=page_size)
+    print(f"Clustered logs saved to {output_file} (index: {index_file})")
+
+
+def write_grouped_logs(log_clusters, processed_logs, output_file, index_file, page_size=1000):
+    """
+    Write the lines grouped by cluster ("Cluster i Logs:" then "- line" per line).
+
+    Lines are grouped with one argsort pass and written a page at a time through a
+    buffered writer. The JSONL index has one record per cluster: line count, byte
+    offset and length of its lines, and the byte offset of every page of page_size
+    lines, so a reader can seek straight to any page (see read_cluster_page).
+    """
+    order, counts, starts = group_by_cluster(log_clusters)
+    logs = np.asarray(processed_logs, dtype=object)
+    index = []
+    with open(output_file, "wb", buffering=1024 * 1024) as file:
+        for cluster in range(len(counts)):
+            file.write(f"Cluster {cluster} Logs:\n".encode())
+            offset = file.tell()
+            page_offsets = []
+            members = order[starts[cluster]:starts[cluster] + counts[cluster]]
+            for page_start in range(0, len(members), page_size):
+                page_offsets.append(file.tell())
+                page = logs[members[page_start:page_start + page_size]]
+                file.write(("- " + "\n- ".join(page) + "\n").encode())
+            index.append({"cluster": cluster, "count": int(counts[cluster]), "offset": offset,
+                          "length": file.tell() - offset, "page_size": page_size, "page_offsets": page_offsets})
+            file.write(b"\n")
+    with open(index_file, "w") as file:
+        file.writelines(json.dumps(record) + "\n" for record in index)
+
+
+def read_cluster_page(cluster, page, output_file=None, index_file=None):
+    """
+    Read one page of a cluster's lines from the file written by save_clustered_logs,
+    seeking through its index instead of reading the whole file.
+    """
+    data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data")
+    output_file = output_file or os.path.join(data_folder, "log_clusters.txt")
+    index_file = index_file or os.path.join(data_folder, "log_clusters_index.jsonl")
+    with open(index_file) as file:
+        record = next((r for r in map(json.loads, file) if r["cluster"] == cluster), None)
+    if record is None or not 0 <= page < len(record["page_offsets"]):
+        return []
+    n_lines = min(record["page_size"], record["count"] - page * record["page_size"])
+    with open(output_file, "rb") as file:
+        file.seek(record["page_offsets"][page])
+        return [file.readline().decode()[2:].rstrip("\n") for _ in range(n_lines)]
@@ -0,0 +1,199 @@
+import hashlib
+import mmap
+import os
+
+import numpy as np
+
+from scripts.log_analysis import parse_log_text
+
+INDEX_EVERY = 1024  # Lines between index entries
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+TIMESTAMP_WIDTH = 26  # "YYYY-MM-DD HH:MM:SS.ffffff"
+FINGERPRINT_BYTES = 4096  # Leading bytes hashed to tell a rotated file from an appended one
+
+
+def index_path_for(log_file):
+    return log_file + ".idx.npz"
+
+
+def _file_fingerprint(log_file, n_bytes):
+    with open(log_file, "rb") as file:
+        return hashlib.blake2b(file.read(n_bytes), digest_size=16).hexdigest()
+
+
+def _indexes_same_file(index, log_file, size):
+    """
+    Whether index was built on an earlier state of log_file: same inode, not
+    larger, and the same leading bytes (rotation by copy + truncate keeps the inode).
+    """
+    if "inode" not in index or index["size"] > size or index["inode"] != os.stat(log_file).st_ino:
+        return False
+    return index["fingerprint"] == _file_fingerprint(log_file, min(index["size"], FINGERPRINT_BYTES))
+
+
+def build_log_index(log_file, index_file=None, every=INDEX_EVERY):
+    """
+    Build a sparse timestamp -> byte offset index of a log file in the
+    "YYYY-MM-DD HH:MM:SS - LEVEL - message" format (see Generate_logs.py).
+
+    Every `every`-th line start is recorded with its timestamp (lines without one
+    are skipped), found by scanning the file in blocks for newlines with NumPy;
+    only the sampled lines are parsed. If an index for a shorter version of the
+    same file exists (same inode and leading bytes, so a rotated file that has
+    grown past the old size is not mistaken for it), only the appended bytes are
+    scanned. The index is saved as .npz next to the log (or to index_file) and
+    returned as a dict.
+    """
+    index_file = index_file or index_path_for(log_file)
+    size = os.path.getsize(log_file)
+    timestamps, offsets = [], []
+    start, n_lines = 0, 0
+    if os.path.exists(index_file):
+        index = load_log_index(index_file)
+        if index["every"] == every and _indexes_same_file(index, log_file, size):
+            timestamps, offsets = [index["timestamps"]], [index["offsets"]]
+            start, n_lines = index["size"], index["n_lines"]
+
+    with open(log_file, "rb") as file:
+        # Whether the first byte to scan starts a line (an appended file may not end with a newline)
+        at_line_start = start == 0 or os.pread(file.fileno(), 1, start - 1) == b"\n"
+        file.seek(start)
+        position = start
+        while True:
+            block = file.read(SCAN_BLOCK_SIZE)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+            line_starts = newlines[newlines < len(block) - 1] + 1
+            if at_line_start:
+                line_starts = np.concatenate([[0], line_starts])
+            at_line_start = block.endswith(b"\n")
+            sampled = line_starts[(n_lines + np.arange(len(line_starts))) % every == 0]
+            n_lines += len(line_starts)
+            if len(sampled):
+                # Heads cut off by the end of the block are read directly
+                heads = [(block[offset:offset + TIMESTAMP_WIDTH] if offset + TIMESTAMP_WIDTH <= len(block)
+                          else os.pread(file.fileno(), TIMESTAMP_WIDTH, position + offset)).decode("ascii", "replace")
+                         for offset in sampled]
+                stamps = _parse_timestamps(heads)
+                valid = ~np.isnat(stamps)
+                timestamps.append(stamps[valid].view(np.int64))
+                offsets.append(position + sampled[valid])
+            position += len(block)
+
+    index = {
+        "timestamps": np.concatenate(timestamps) if timestamps else np.empty(0, dtype=np.int64),
+        "offsets": np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64),
+        "size": position,
+        "n_lines": n_lines,
+        "every": every,
+        "inode": os.stat(log_file).st_ino,
+        "fingerprint": _file_fingerprint(log_file, min(position, FINGERPRINT_BYTES)),
+    }
+    np.savez(index_file, **index)
+    return index
+
+
+def load_log_index(index_file):
+    with np.load(index_file) as data:
+        return {key: data[key] if data[key].ndim else data[key].item() for key in data.files}
+
+
+def _parse_timestamps(heads):
+    # The timestamp is the text before " - "; anything else (continuation lines) becomes NaT
+    values = []
+    for head in heads:
+        end = head.find(" - ")
+        value = head[:end] if end > 0 else head.rstrip("\n")
+        values.append(value if value[:4].isdigit() and value[4:5] == "-" else "NaT")
+    try:
+        return np.array(values, dtype="datetime64[us]")
+    except ValueError:
+        return np.array([_to_datetime(value) for value in values], dtype="datetime64[us]")
+
+
+def _to_datetime(value):
+    try:
+        return np.datetime64(value, "us")
+    except ValueError:
+        return np.datetime64("NaT", "us")
+
+
+class LogStore:
+    """
+    Time-range queries over a log file through its sparse timestamp index.
+
+    The index is built (or extended, after appends) on open; the log file is
+    memory-mapped, so a query binary-searches the index for the blocks that can
+    hold [start, end), parses only those bytes and filters by timestamp and,
+    optionally, level. Lines without a timestamp take the timestamp and level of
+    the line before them. Assumes the file is written in time order, as log files are.
+    """
+
+    def __init__(self, log_file, index_file=None, every=INDEX_EVERY):
+        self.log_file = log_file
+        self.index_file = index_file or index_path_for(log_file)
+        self.every = every
+        self._file = None
+        self._map = None
+        self.refresh()
+
+    def refresh(self):
+        """
+        Index any bytes appended since the last refresh and remap the file.
+        """
+        self.close()
+        size = os.path.getsize(self.log_file)
+        index = None
+        if os.path.exists(self.index_file):
+            index = load_log_index(self.index_file)
+            if (index["every"] != self.every or index["size"] != size
+                    or not _indexes_same_file(index, self.log_file, size)):
+                index = None
+        self.index = index or build_log_index(self.log_file, self.index_file, self.every)
+        self._file = open(self.log_file, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def query(self, start, end, levels=None):
+        """
+        Log records with start <= timestamp < end (anything np.datetime64 accepts),
+        optionally only those whose level is in `levels`. Returns a dict like the
+        stream_logs batches: "timestamp", "level" and "message".
+        """
+        start = np.datetime64(start, "us").astype(np.int64)
+        end = np.datetime64(end, "us").astype(np.int64)
+        timestamps, offsets = self.index["timestamps"], self.index["offsets"]
+        # From the last indexed line before start to the first indexed line at or after end
+        first = np.searchsorted(timestamps, start, side="left") - 1
+        last = np.searchsorted(timestamps, end, side="left")
+        begin = int(offsets[first]) if first >= 0 else 0
+        stop = int(offsets[last]) if last < len(offsets) else len(self._map)
+        text = self._map[begin:stop].decode("utf-8", errors="replace")
+        batch = parse_log_text(text[:-1] if text.endswith("\n") else text)
+
+        # Continuation lines (no timestamp) belong to the last line before them that has one
+        known = ~np.isnat(batch["timestamp"])
+        parent = np.maximum.accumulate(np.where(known, np.arange(len(known)), 0))
+        stamps = batch["timestamp"].view(np.int64)[parent]
+        keep = known[parent] & (stamps >= start) & (stamps < end)
+        if levels is not None:
+            keep &= np.isin(batch["level"][parent], list(levels))
+        # Continuation lines are returned with their parent's timestamp and level
+        return {
+            "timestamp": batch["timestamp"][parent][keep],
+            "level": batch["level"][parent][keep],
+            "message": [message for message, selected in zip(batch["message"], keep) if selected],
+        }
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing.util import Finalize
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scripts import anomaly_detection, preprocessing
+
+DEFAULT_BUNDLE_PATH = "./models/anomaly_models_by_instance.pkl"
+
+
+def train_per_instance_models(data, group_column="InstanceId", bundle_path=DEFAULT_BUNDLE_PATH, n_components=None,
+                              drop_columns=["Timestamp", "Error_Rate_Percentage"], z_threshold=3, mi_method="binned",
+                              contamination=0.05, n_estimators=100, min_rows=50, n_jobs=-1):
+    """
+    Preprocess and train one Isolation Forest per instance (or any other dimension
+    column) across a process pool.
+
+    data is a CSV path or a DataFrame. Rows are sorted by group once and the numeric
+    matrix is copied into a shared memory block; workers attach to it and receive
+    only (offset, length) ranges, so the metrics are never pickled per task.
+    Returns a bundle {group: {"model", "pipeline", "n_rows"}} saved to bundle_path.
+    """
+    df = pd.read_csv(data) if isinstance(data, str) else data
+    print(f"Partitioning {len(df)} rows by {group_column}...")
+    df = df.sort_values(group_column, kind="stable")
+    groups, starts, counts = np.unique(df[group_column].to_numpy(), return_index=True, return_counts=True)
+
+    # Non-numeric columns (the group key, timestamps) stay out of the shared matrix
+    numeric = df.drop(columns=[group_column]).select_dtypes(include="number")
+    columns = list(numeric.columns)
+    worker_drop_columns = [column for column in drop_columns if column in columns]
+
+    tasks = [(group, start, count) for group, start, count in zip(groups, starts, counts) if count >= min_rows]
+    skipped = len(groups) - len(tasks)
+    if skipped:
+        print(f"Skipping {skipped} groups with fewer than {min_rows} rows")
+
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    shm = shared_memory.SharedMemory(create=True, size=max(numeric.shape[0] * numeric.shape[1] * 8, 1))
+    try:
+        shared = np.ndarray(numeric.shape, dtype=np.float64, buffer=shm.buf)
+        for j, column in enumerate(columns):
+            shared[:, j] = numeric[column].to_numpy(dtype=np.float64)
+        del numeric
+
+        settings = dict(
+            shm_name=shm.name, shape=shared.shape, columns=columns, n_components=n_components,
+            drop_columns=worker_drop_columns, z_threshold=z_threshold, mi_method=mi_method,
+            contamination=contamination, n_estimators=n_estimators,
+        )
+        print(f"Training {len(tasks)} per-instance models with {n_jobs} workers...")
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(settings,)) as executor:
+            results = list(executor.map(_train_group, tasks, chunksize=max(1, len(tasks) // (n_jobs * 4))))
+        elapsed = time.perf_counter() - start_time
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    bundle = {}
+    for group, model, pipeline, n_rows, seconds in results:
+        bundle[group] = {"model": model, "pipeline": pipeline, "n_rows": n_rows, "train_seconds": seconds}
+    total_rows = sum(entry["n_rows"] for entry in bundle.values())
+    print(f"Trained {len(bundle)} models on {total_rows} rows in {elapsed:.2f}s "
+          f"({total_rows / elapsed:.0f} rows/s, {len(bundle) / elapsed:.1f} models/s)")
+
+    if bundle_path:
+        os.makedirs(os.path.dirname(bundle_path) or ".", exist_ok=True)
+        print(f"Saving per-instance model bundle to {bundle_path}...")
+        joblib.dump(bundle, bundle_path)
+    return bundle
+
+
+def predict_anomalies_per_instance(df, bundle, group_column="InstanceId"):
+    """
+    Score raw metric rows with their instance's pipeline and model.
+    Returns 1 for normal, -1 for anomaly and 0 for instances without a model.
+    """
+    predictions = np.zeros(len(df), dtype=int)
+    # Group the rows once (stable sort by group) instead of scanning every row per instance
+    groups, inverse, counts = np.unique(df[group_column].to_numpy(), return_inverse=True, return_counts=True)
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    for group, start, count in zip(groups, starts, counts):
+        entry = bundle.get(group)
+        if entry is not None:
+            rows = order[start:start + count]
+            X = entry["pipeline"].transform(df.iloc[rows])
+            predictions[rows] = entry["model"].predict(X)
+    return predictions
+
+
+_worker_settings = None
+_worker_shm = None
+
+
+def _init_worker(settings):
+    global _worker_settings, _worker_shm
+    _worker_settings = settings
+    _worker_shm = shared_memory.SharedMemory(name=settings["shm_name"])
+    # Detach when the worker exits; the parent unlinks the block
+    Finalize(_worker_shm, _worker_shm.close, exitpriority=10)
+
+
+def _train_group(task):
+    group, start, count = task
+    settings = _worker_settings
+    start_time = time.perf_counter()
+    shared = np.ndarray(settings["shape"], dtype=np.float64, buffer=_worker_shm.buf)
+    # Private copy: imputation writes into the frame, and other workers read the shared block
+    df = pd.DataFrame(shared[start:start + count], columns=settings["columns"], copy=True)
+    del shared
+
+    # Per-step progress output from hundreds of groups would drown the summary
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, scaler, pipeline = preprocessing.preprocess_dataframe(
+            df, settings["n_components"], settings["drop_columns"], settings["z_threshold"], settings["mi_method"],
+            n_jobs=1,
+        )
+        model = anomaly_detection.build_anomaly_detection_model(settings["contamination"], settings["n_estimators"])
+        model.fit(X)
+    return group, model, pipeline, count, time.perf_counter() - start_time
@@ -1,9 +1,12 @@
-<<<<<<< HEAD
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.metrics import mean_squared_error, r2_score
+from joblib import Parallel, delayed
+from scripts.array_forest import export_random_forest
+from scripts.model_store import save_model
 import joblib
 import os
+import time
 import numpy as np
 import logging
 
@@ -13,6 +16,8 @@ def setup_logger():
     """
     logger = logging.getLogger('PredictiveMaintenance')
     logger.setLevel(logging.DEBUG)
+    if logger.handlers:  # Already configured by an earlier training run
+        return logger
     handler = logging.FileHandler('predictive_maintenance.log')
     handler.setLevel(logging.DEBUG)
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -20,35 +25,67 @@ def setup_logger():
     logger.addHandler(handler)
     return logger
 
-def train_predictive_maintenance_model(X, y, model_path, n_estimators=100, max_depth=None, random_state=42):
+def train_predictive_maintenance_model(X, y, model_path, n_estimators=100, max_depth=None, random_state=42,
+                                       evaluation="oob", cv=5, n_jobs=-1, array_path=None, store_path=None,
+                                       **forest_params):
     """
     Train a regression model to predict error rates.
+
+    evaluation="oob" (default) fits one forest and scores it on its out-of-bag
+    samples, so no extra forests are trained. evaluation="cv" trains one forest
+    per fold in parallel, splitting the n_estimators trees between them, scores
+    each on its held-out fold and then merges the fold forests into the returned
+    model instead of refitting. Those fold scores are for the n_estimators / cv
+    tree fold forests, not for the merged model (whose trees were each grown on
+    a different 1 - 1/cv of the data), and are logged as such. Per-phase timings
+    are logged at the end. Extra keyword arguments (e.g. tuned min_samples_leaf)
+    go to RandomForestRegressor.
+    Pass array_path to also export the compact float32 version used by the Lambda, and
+    store_path to also save that version as a memory-mapped model store.
     """
     logger = setup_logger()
+    timings = {}
     
     # Splitting data into training and testing sets
     logger.info("Splitting data into training and testing sets...")
+    start = time.perf_counter()
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
-    
-    # Model initialization
-    logger.info("Training Random Forest regression model...")
-    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=random_state)
-    model.fit(X_train, y_train)
-    
-    # Cross-validation
-    logger.info("Performing cross-validation...")
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='neg_mean_squared_error')
-    avg_cv_score = np.mean(cv_scores)
-    logger.info(f"Average cross-validation MSE: {-avg_cv_score:.2f}")
+    timings["split"] = time.perf_counter() - start
+    
+    if evaluation == "oob":
+        # Model initialization
+        logger.info("Training Random Forest regression model with out-of-bag scoring...")
+        start = time.perf_counter()
+        model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=random_state,
+                                      oob_score=True, n_jobs=n_jobs, **forest_params)
+        model.fit(X_train, y_train)
+        timings["fit"] = time.perf_counter() - start
+        oob_mse = mean_squared_error(y_train, model.oob_prediction_)
+        logger.info(f"Out-of-bag MSE: {oob_mse:.2f}, out-of-bag R2: {model.oob_score_:.2f}")
+    elif evaluation == "cv":
+        logger.info(f"Training {cv} fold models in parallel for cross-validation...")
+        start = time.perf_counter()
+        model, cv_mse = cross_validate_forest(X_train, y_train, n_estimators, max_depth, random_state, cv, n_jobs,
+                                              **forest_params)
+        timings["cv_fit"] = time.perf_counter() - start
+        trees_per_fold = f"{n_estimators // cv}" + (f"-{n_estimators // cv + 1}" if n_estimators % cv else "")
+        logger.info(f"Fold MSEs of the {trees_per_fold}-tree fold forests: {', '.join(f'{mse:.2f}' for mse in cv_mse)}")
+        logger.info(f"Average fold MSE: {np.mean(cv_mse):.2f} (for {trees_per_fold}-tree forests; "
+                    f"not a cross-validated score of the merged model)")
+        logger.info(f"Merged {len(model.estimators_)} fold trees into the final model")
+    else:
+        raise ValueError(f"Unknown evaluation {evaluation!r}, expected 'oob' or 'cv'")
     
     # Evaluating the model
     logger.info("Evaluating the model...")
+    start = time.perf_counter()
     y_pred = model.predict(X_test)
     mse = mean_squared_error(y_test, y_pred)
     r2 = r2_score(y_test, y_pred)
     
     logger.info(f"Mean Squared Error: {mse:.2f}")
     logger.info(f"R2 Score: {r2:.2f}")
+    timings["evaluate"] = time.perf_counter() - start
     
     # Feature importance (Handle X as NumPy array)
     feature_importances = model.feature_importances_
@@ -58,6 +95,7 @@ def train_predictive_maintenance_model(X, y, model_path, n_estimators=100, max_d
     
     # Save model
     logger.info("Saving regression model...")
+    start = time.perf_counter()
     model_dir = os.path.dirname(model_path)
     if not os.path.exists(model_dir):
         os.makedirs(model_dir)
@@ -67,76 +105,45 @@ def train_predictive_maintenance_model(X, y, model_path, n_estimators=100, max_d
         logger.info(f"Model successfully saved to {model_path}")
     except Exception as e:
         logger.error(f"Error saving model: {e}")
-    
-=======
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_squared_error, r2_score
-import joblib
-import os
-import numpy as np
-import logging
+    if array_path:
+        array_model = export_random_forest(model, array_path)
+        logger.info(f"Compact array export saved to {array_path}")
+        if store_path:
+            save_model(array_model, store_path)
+            logger.info(f"Memory-mapped model store saved to {store_path}")
+    timings["save"] = time.perf_counter() - start
+    
+    logger.info("Phase timings: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+                + f" (total {sum(timings.values()):.2f}s)")
+    return model
 
-def setup_logger():
+def cross_validate_forest(X, y, n_estimators=100, max_depth=None, random_state=42, cv=5, n_jobs=-1, **forest_params):
     """
-    Set up a logger for tracking model training and evaluation steps.
+    K-fold cross-validation where every fold forest is kept: fold k grows its
+    share of the n_estimators trees (n_estimators // cv, one more for the first
+    n_estimators % cv folds) on the other folds and is scored on fold k, then all
+    fold trees are merged into one forest of exactly n_estimators trees. Returns
+    (model, fold MSEs); the MSEs measure the fold forests, not the merged one.
     """
-    logger = logging.getLogger('PredictiveMaintenance')
-    logger.setLevel(logging.DEBUG)
-    handler = logging.FileHandler('predictive_maintenance.log')
-    handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    return logger
+    if n_estimators < cv:
+        raise ValueError(f"n_estimators={n_estimators} is too few to give each of the {cv} folds a tree")
+    folds = list(KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X))
+    # Folds run in separate workers; each forest is single-threaded
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(X, y, train_index, test_index, n_estimators // cv + (fold < n_estimators % cv), max_depth,
+                           random_state + fold, forest_params)
+        for fold, (train_index, test_index) in enumerate(folds)
+    )
+    fold_models = [fold_model for fold_model, _ in results]
 
-def train_predictive_maintenance_model(X, y, model_path, n_estimators=100, max_depth=None, random_state=42):
-    """
-    Train a regression model to predict error rates.
-    """
-    logger = setup_logger()
-    
-    # Splitting data into training and testing sets
-    logger.info("Splitting data into training and testing sets...")
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
-    
-    # Model initialization
-    logger.info("Training Random Forest regression model...")
-    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=random_state)
-    model.fit(X_train, y_train)
-    
-    # Cross-validation
-    logger.info("Performing cross-validation...")
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='neg_mean_squared_error')
-    avg_cv_score = np.mean(cv_scores)
-    logger.info(f"Average cross-validation MSE: {-avg_cv_score:.2f}")
-    
-    # Evaluating the model
-    logger.info("Evaluating the model...")
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-    
-    logger.info(f"Mean Squared Error: {mse:.2f}")
-    logger.info(f"R2 Score: {r2:.2f}")
-    
-    # Feature importance (Handle X as NumPy array)
-    feature_importances = model.feature_importances_
-    logger.info("Feature importances:")
-    for i, importance in enumerate(feature_importances):
-        logger.info(f"Feature {i}: {importance:.4f}")
-    
-    # Save model
-    logger.info("Saving regression model...")
-    model_dir = os.path.dirname(model_path)
-    if not os.path.exists(model_dir):
-        os.makedirs(model_dir)
-    
-    try:
-        joblib.dump(model, model_path)
-        logger.info(f"Model successfully saved to {model_path}")
-    except Exception as e:
-        logger.error(f"Error saving model: {e}")
-    
->>>>>>> c5178ecea56ca2ecd0ef0b4b7d463a93e55be81a
-    return model
\ No newline at end of file
+    model = fold_models[0]
+    model.estimators_ = [tree for fold_model in fold_models for tree in fold_model.estimators_]
+    model.n_estimators = len(model.estimators_)
+    return model, [mse for _, mse in results]
+
+def _fit_fold(X, y, train_index, test_index, n_estimators, max_depth, random_state, forest_params):
+    X, y = np.asarray(X), np.asarray(y)
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=random_state,
+                                  **forest_params)
+    model.fit(X[train_index], y[train_index])
+    return model, mean_squared_error(y[test_index], model.predict(X[test_index]))
@@ -1,13 +1,36 @@
-<<<<<<< HEAD
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 from sklearn.impute import SimpleImputer
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, IncrementalPCA
 from sklearn.feature_selection import mutual_info_regression
 import numpy as np
+import os
+import tempfile
+import time
 
+from scripts.feature_selection import binned_mutual_info
+from scripts.pipeline import PreprocessingPipeline
 
-def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timestamp", "Error_Rate_Percentage"]):
+
+def resolve_pca_method(pca_method=None, chunksize=None):
+    """
+    PCA solver load_and_preprocess_data uses: pca_method if given, else "incremental"
+    when streaming (chunksize set) and "full" in memory.
+    """
+    return pca_method or ("incremental" if chunksize else "full")
+
+
+def resolve_mi_method(mi_method=None, chunksize=None):
+    """
+    Mutual-information estimator load_and_preprocess_data uses: mi_method if given,
+    else "binned" when streaming (it scores a fixed-size sample, where the kNN one
+    copies the whole matrix into memory) and "knn" in memory.
+    """
+    return mi_method or ("binned" if chunksize else "knn")
+
+
+def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timestamp", "Error_Rate_Percentage"], chunksize=None,
+                             z_threshold=3, pipeline_path=None, mi_method=None, pca_method=None):
     """
     Load and preprocess the synthetic data:
     - Handle missing values.
@@ -15,10 +38,40 @@ def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timest
     - Normalize the features.
     - Optionally reduce dimensionality using PCA.
     - Perform feature selection based on mutual information.
+
+    Pass chunksize to stream the CSV instead of loading it in one go
+    (see load_and_preprocess_data_chunked). Pass pipeline_path to save the
+    fitted transform as a PreprocessingPipeline for inference. mi_method="binned"
+    swaps the kNN mutual-information estimator for the faster histogram one; it
+    defaults to "knn" in memory and "binned" when streaming (resolve_mi_method).
+    pca_method picks the PCA solver (see select_features_and_reduce); it defaults
+    to "full" in memory and "incremental" when streaming (resolve_pca_method).
     """
+    pca_method = resolve_pca_method(pca_method, chunksize)
+    mi_method = resolve_mi_method(mi_method, chunksize)
+    if chunksize:
+        return load_and_preprocess_data_chunked(file_path, n_components, drop_columns, chunksize=chunksize,
+                                                z_threshold=z_threshold, pipeline_path=pipeline_path, mi_method=mi_method,
+                                                pca_method=pca_method)
+
     print("Loading synthetic data...")
     df = pd.read_csv(file_path)
 
+    X_normalized, y, scaler, pipeline = preprocess_dataframe(df, n_components, drop_columns, z_threshold, mi_method,
+                                                             pca_method=pca_method)
+
+    if pipeline_path:
+        pipeline.save(pipeline_path)
+
+    return X_normalized, y, scaler
+
+
+def preprocess_dataframe(df, n_components=None, drop_columns=["Timestamp", "Error_Rate_Percentage"], z_threshold=3,
+                         mi_method="knn", n_jobs=-1, pca_method="full"):
+    """
+    Run the in-memory preprocessing steps on an already loaded DataFrame.
+    Returns X_normalized, y, the fitted scaler and the PreprocessingPipeline.
+    """
     # Step 1: Handle missing values
     print("Handling missing values...")
     missing_values = df.isnull().sum()
@@ -32,6 +85,8 @@ def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timest
     print(f"Dropping unnecessary columns: {drop_columns}")
     X = df.drop(columns=drop_columns)
     y = df["Error_Rate_Percentage"]
+    input_columns = X.columns
+    fill_values = X.mean()  # Imputation means; unchanged by the imputation itself
 
     # Step 3: Remove constant or quasi-constant features
     print("Removing constant or quasi-constant features...")
@@ -44,7 +99,7 @@ def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timest
     # Step 4: Detect and handle outliers (using z-scores)
     print("Detecting and removing outliers...")
     z_scores = np.abs((X - X.mean()) / X.std())
-    threshold = 3  # Z-score threshold for identifying outliers
+    threshold = z_threshold  # Z-score threshold for identifying outliers
     outliers = (z_scores > threshold).any(axis=1)
     if outliers.sum() > 0:
         print(f"Removing {outliers.sum()} outliers...")
@@ -56,91 +111,203 @@ def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timest
     scaler = MinMaxScaler()
     X_normalized = scaler.fit_transform(X)
 
-    # Step 6: Feature selection based on mutual information
-    print("Performing feature selection based on mutual information...")
-    mutual_info = mutual_info_regression(X_normalized, y)
-    selected_features = X.columns[mutual_info > 0.01]  # Retain features with non-trivial mutual info
-    print(f"Selected features: {list(selected_features)}")
-    X_normalized = X_normalized[:, mutual_info > 0.01]
-
-    # Step 7: Optional dimensionality reduction (PCA)
-    if n_components:
-        print(f"Reducing dimensions to {n_components} components using PCA...")
-        pca = PCA(n_components=1)
-        X_normalized = pca.fit_transform(X_normalized)
-        print(f"Explained variance ratio by PCA: {pca.explained_variance_ratio_}")
+    X_normalized, feature_mask, pca = select_features_and_reduce(X_normalized, y, X.columns, n_components, mi_method,
+                                                                 n_jobs, pca_method)
+    pipeline = PreprocessingPipeline.from_fitted(input_columns, fill_values, X.columns, scaler, feature_mask, pca)
 
-=======
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
-from sklearn.impute import SimpleImputer
-from sklearn.decomposition import PCA
-from sklearn.feature_selection import mutual_info_regression
-import numpy as np
+    return X_normalized, y, scaler, pipeline
 
 
-def load_and_preprocess_data(file_path, n_components=None, drop_columns=["Timestamp", "Error_Rate_Percentage"]):
+def load_and_preprocess_data_chunked(file_path, n_components=None, drop_columns=["Timestamp", "Error_Rate_Percentage"],
+                                     chunksize=100_000, output_file=None, z_threshold=3, pipeline_path=None,
+                                     mi_method="binned", pca_method="incremental"):
     """
-    Load and preprocess the synthetic data:
-    - Handle missing values.
-    - Remove unnecessary columns.
-    - Normalize the features.
-    - Optionally reduce dimensionality using PCA.
-    - Perform feature selection based on mutual information.
+    Streaming variant of load_and_preprocess_data for exports too large to fit in memory.
+
+    The CSV is read twice, one chunk at a time:
+    - Pass 1 accumulates per-column mean/variance and min/max with partial_fit,
+      which is all that imputation, the quasi-constant check and the z-scores need.
+    - Pass 2 imputes, drops outliers and fits the MinMax scaler chunk by chunk,
+      writing inlier rows straight into a preallocated .npy memmap (output_file,
+      or by default a temporary file that is deleted once the array is released)
+      that is then scaled in place.
+    Mutual information defaults to the binned estimator, which reads only a
+    stratified sample of rows (mi_method="knn" loads the whole matrix into memory),
+    and PCA to the incremental solver, fed chunksize rows at a time. Only the
+    target y (value and row label, 16 bytes per kept row) is held in memory in full.
+    The output matches load_and_preprocess_data on the same file with the same
+    mi_method and pca_method.
     """
-    print("Loading synthetic data...")
-    df = pd.read_csv(file_path)
+    print(f"Streaming synthetic data in chunks of {chunksize} rows...")
+    target = "Error_Rate_Percentage"
+
+    # Pass 1: online column statistics
+    print("Computing column statistics...")
+    stats = StandardScaler()
+    ranges = MinMaxScaler()
+    missing_values = None
+    n_rows = 0
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        numeric = chunk.drop(columns=[column for column in drop_columns if column != target])
+        missing = numeric.isnull().sum()
+        missing_values = missing if missing_values is None else missing_values + missing
+        stats.partial_fit(numeric)
+        ranges.partial_fit(numeric)
+        n_rows += len(chunk)
+
+    columns = numeric.columns
+    mean = pd.Series(stats.mean_, index=columns)
+    # var_ is the population variance of the non-missing values; mean imputation
+    # adds rows without adding squared deviations, so only the divisor changes.
+    n_valid = np.broadcast_to(stats.n_samples_seen_, stats.var_.shape)
+    std = pd.Series(np.sqrt(stats.var_ * n_valid / (n_rows - 1)), index=columns)
 
     # Step 1: Handle missing values
     print("Handling missing values...")
-    missing_values = df.isnull().sum()
     if missing_values.any():
         print(f"Missing values detected:\n{missing_values}")
         print("Imputing missing values using mean strategy...")
-        imputer = SimpleImputer(strategy="mean")
-        df.iloc[:, :] = imputer.fit_transform(df)
+    fill_values = mean[missing_values > 0].to_dict()
 
     # Step 2: Drop unnecessary columns
     print(f"Dropping unnecessary columns: {drop_columns}")
-    X = df.drop(columns=drop_columns)
-    y = df["Error_Rate_Percentage"]
+    features = columns.drop(target, errors="ignore")
+    input_columns = features
 
     # Step 3: Remove constant or quasi-constant features
     print("Removing constant or quasi-constant features...")
-    n_unique = X.nunique()
-    quasi_constant_features = n_unique[n_unique <= 1].index.tolist()
+    constant = pd.Series(ranges.data_min_ == ranges.data_max_, index=columns)[features]
+    quasi_constant_features = constant[constant].index.tolist()
     if quasi_constant_features:
         print(f"Removing features: {quasi_constant_features}")
-        X = X.drop(columns=quasi_constant_features)
+        features = features.drop(quasi_constant_features)
+    feature_mean = mean[features].to_numpy()
+    feature_std = std[features].to_numpy()
 
-    # Step 4: Detect and handle outliers (using z-scores)
+    # Pass 2: Steps 4 and 5, chunk by chunk
     print("Detecting and removing outliers...")
-    z_scores = np.abs((X - X.mean()) / X.std())
-    threshold = 3  # Z-score threshold for identifying outliers
-    outliers = (z_scores > threshold).any(axis=1)
-    if outliers.sum() > 0:
-        print(f"Removing {outliers.sum()} outliers...")
-        X = X[~outliers]
-        y = y[~outliers]
+    threshold = z_threshold  # Z-score threshold for identifying outliers
+    if output_file:
+        X_normalized = np.lib.format.open_memmap(output_file, mode="w+", dtype=np.float64, shape=(n_rows, len(features)))
+    else:
+        # Unlinked right away: the mapping stays valid and the OS reclaims the file with it
+        handle, temporary_file = tempfile.mkstemp(suffix=".npy")
+        os.close(handle)
+        X_normalized = np.lib.format.open_memmap(temporary_file, mode="w+", dtype=np.float64,
+                                                 shape=(n_rows, len(features)))
+        os.remove(temporary_file)
+    y_values = np.empty(n_rows)
+    y_index = np.empty(n_rows, dtype=np.int64)
+    scaler = MinMaxScaler()
+    n_kept = 0
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        if fill_values:
+            chunk = chunk.fillna(fill_values)
+        X_chunk = chunk[features].to_numpy(dtype=np.float64)
+        inliers = ~(np.abs((X_chunk - feature_mean) / feature_std) > threshold).any(axis=1)
+        X_chunk = X_chunk[inliers]
+        if len(X_chunk) == 0:
+            continue
+        scaler.partial_fit(X_chunk)
+        end = n_kept + len(X_chunk)
+        X_normalized[n_kept:end] = X_chunk
+        y_values[n_kept:end] = chunk[target].to_numpy(dtype=np.float64)[inliers]
+        y_index[n_kept:end] = chunk.index[inliers]
+        n_kept = end
+    if n_kept == 0:
+        raise ValueError(f"All {n_rows} rows are outliers at z_threshold={z_threshold}; nothing left to scale")
+    if n_kept < n_rows:
+        print(f"Removing {n_rows - n_kept} outliers...")
+    X_normalized = X_normalized[:n_kept]
+    y = pd.Series(y_values[:n_kept], index=y_index[:n_kept], name=target)
 
-    # Step 5: Normalize the data
     print("Normalizing data...")
-    scaler = MinMaxScaler()
-    X_normalized = scaler.fit_transform(X)
+    for start in range(0, n_kept, chunksize):
+        block = X_normalized[start:start + chunksize]
+        block *= scaler.scale_
+        block += scaler.min_
+
+    X_normalized, feature_mask, pca = select_features_and_reduce(X_normalized, y, features, n_components, mi_method,
+                                                                 pca_method=pca_method, batch_size=chunksize)
+
+    if pipeline_path:
+        pipeline = PreprocessingPipeline.from_fitted(input_columns, mean[input_columns], features, scaler, feature_mask, pca)
+        pipeline.save(pipeline_path)
+
+    return X_normalized, y, scaler
+
+
+def select_features_and_reduce(X_normalized, y, feature_names, n_components=None, mi_method="knn", n_jobs=-1,
+                               pca_method="full", batch_size=100_000):
+    """
+    Shared tail of the preprocessing paths: mutual-information feature
+    selection followed by optional PCA. Returns the reduced matrix, the
+    selected-feature mask and the fitted PCA (None if skipped).
+
+    mi_method is "knn" (sklearn's mutual_info_regression) or "binned"
+    (feature_selection.binned_mutual_info: histogram MI on a stratified sample,
+    scored in a process pool).
 
+    pca_method is "full" (exact SVD), "randomized" (randomized SVD, for wide
+    feature sets) or "incremental" (IncrementalPCA fitted and applied batch_size
+    rows at a time, so a memory-mapped X never has to be loaded at once).
+    n_components is capped at the number of selected features.
+    """
     # Step 6: Feature selection based on mutual information
-    print("Performing feature selection based on mutual information...")
-    mutual_info = mutual_info_regression(X_normalized, y)
-    selected_features = X.columns[mutual_info > 0.01]  # Retain features with non-trivial mutual info
+    print(f"Performing feature selection based on mutual information ({mi_method})...")
+    start = time.perf_counter()
+    if mi_method == "binned":
+        mutual_info = binned_mutual_info(X_normalized, y, n_jobs=n_jobs)
+    elif mi_method == "knn":
+        mutual_info = mutual_info_regression(X_normalized, y)
+    else:
+        raise ValueError(f"Unknown mi_method: {mi_method}")
+    print(f"Mutual information computed in {time.perf_counter() - start:.2f}s")
+    selected_features = feature_names[mutual_info > 0.01]  # Retain features with non-trivial mutual info
     print(f"Selected features: {list(selected_features)}")
-    X_normalized = X_normalized[:, mutual_info > 0.01]
+    feature_mask = mutual_info > 0.01
+    if not feature_mask.any():
+        # Nothing clears the bar (e.g. a target independent of every metric); keep the best one
+        feature_mask[np.argmax(mutual_info)] = True
+        selected_features = feature_names[feature_mask]
+        print(f"No feature above threshold, keeping the most informative: {list(selected_features)}")
 
     # Step 7: Optional dimensionality reduction (PCA)
+    pca = None
     if n_components:
-        print(f"Reducing dimensions to {n_components} components using PCA...")
-        pca = PCA(n_components=1)
-        X_normalized = pca.fit_transform(X_normalized)
+        n_components = min(n_components, int(feature_mask.sum()))
+        print(f"Reducing dimensions to {n_components} components using PCA ({pca_method})...")
+        if pca_method == "incremental":
+            pca = IncrementalPCA(n_components=n_components)
+            X_normalized = incremental_pca_fit_transform(pca, X_normalized, feature_mask, batch_size)
+        elif pca_method in ("full", "randomized"):
+            pca = PCA(n_components=n_components, svd_solver=pca_method, random_state=42)
+            X_normalized = pca.fit_transform(X_normalized[:, feature_mask])
+        else:
+            raise ValueError(f"Unknown pca_method: {pca_method}")
         print(f"Explained variance ratio by PCA: {pca.explained_variance_ratio_}")
+    else:
+        X_normalized = X_normalized[:, feature_mask]
+
+    return X_normalized, feature_mask, pca
+
+
+def incremental_pca_fit_transform(pca, X, feature_mask, batch_size):
+    """
+    Fit an IncrementalPCA on row batches of X[:, feature_mask], then project X
+    batch by batch. Only one batch of the input is materialized at a time.
+    """
+    n_rows = X.shape[0]
+    # Every partial_fit batch needs at least n_components rows, so fold a short tail into the previous batch
+    batch_size = max(batch_size, pca.n_components)
+    bounds = list(range(0, n_rows, batch_size)) + [n_rows]
+    if len(bounds) > 2 and bounds[-1] - bounds[-2] < pca.n_components:
+        del bounds[-2]
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        pca.partial_fit(X[start:end][:, feature_mask])
 
->>>>>>> c5178ecea56ca2ecd0ef0b4b7d463a93e55be81a
-    return X_normalized, y, scaler 
\ No newline at end of file
+    X_reduced = np.empty((n_rows, pca.n_components_))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        X_reduced[start:end] = pca.transform(X[start:end][:, feature_mask])
+    return X_reduced
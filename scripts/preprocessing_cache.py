@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scripts import preprocessing
+
+DEFAULT_CACHE_DIR = "./cache/preprocessing"
+MAX_CACHE_BYTES = 2 * 1024 ** 3  # 2 GB
+MAX_CACHE_AGE_SECONDS = 7 * 24 * 3600  # One week
+
+
+def file_digest(file_path, block_size=1 << 20):
+    """
+    Hash the contents of a file in fixed-size blocks so memory stays flat on large exports.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(file_path, **params):
+    """
+    Build a cache key from the input file's content hash plus the preprocessing parameters.
+    """
+    payload = json.dumps({"file": file_digest(file_path), "params": params}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+def cached_load_and_preprocess_data(file_path, cache_dir=DEFAULT_CACHE_DIR, n_components=None,
+                                    drop_columns=["Timestamp", "Error_Rate_Percentage"], z_threshold=3,
+                                    chunksize=None, pipeline_path=None, mi_method=None, pca_method=None,
+                                    max_cache_bytes=MAX_CACHE_BYTES,
+                                    max_cache_age=MAX_CACHE_AGE_SECONDS):
+    """
+    Drop-in replacement for preprocessing.load_and_preprocess_data that reuses earlier results.
+
+    Entries are stored as .npy files plus the pickled scaler (and the fitted
+    pipeline when pipeline_path is given), so a hit memory-maps X and y instead
+    of re-parsing the CSV and refitting every step.
+    """
+    key = cache_key(file_path, n_components=n_components, drop_columns=list(drop_columns), z_threshold=z_threshold,
+                    mi_method=preprocessing.resolve_mi_method(mi_method, chunksize),
+                    pca_method=preprocessing.resolve_pca_method(pca_method, chunksize))
+    entry_dir = os.path.join(cache_dir, key)
+    cached_pipeline = os.path.join(entry_dir, "pipeline.npz")
+
+    if os.path.exists(os.path.join(entry_dir, "meta.json")) and (not pipeline_path or os.path.exists(cached_pipeline)):
+        print(f"Loading preprocessed data from cache {entry_dir}...")
+        result = load_cache_entry(entry_dir)
+        if result is not None:
+            if pipeline_path:
+                shutil.copyfile(cached_pipeline, pipeline_path)
+            return result
+
+    X, y, scaler = preprocessing.load_and_preprocess_data(
+        file_path, n_components=n_components, drop_columns=drop_columns, chunksize=chunksize, z_threshold=z_threshold,
+        pipeline_path=pipeline_path, mi_method=mi_method, pca_method=pca_method,
+    )
+    print(f"Saving preprocessed data to cache {entry_dir}...")
+    save_cache_entry(entry_dir, X, y, scaler, source=file_path, pipeline_path=pipeline_path)
+    evict_cache(cache_dir, max_bytes=max_cache_bytes, max_age=max_cache_age)
+    return X, y, scaler
+
+
+def save_cache_entry(entry_dir, X, y, scaler, source=None, pipeline_path=None):
+    """
+    Write one cache entry atomically: build it in a temporary directory, then rename it into place.
+    """
+    cache_dir = os.path.dirname(entry_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".tmp-")
+    try:
+        np.save(os.path.join(tmp_dir, "X.npy"), np.ascontiguousarray(X))
+        np.save(os.path.join(tmp_dir, "y.npy"), np.asarray(y))
+        np.save(os.path.join(tmp_dir, "y_index.npy"), np.asarray(y.index))
+        joblib.dump(scaler, os.path.join(tmp_dir, "scaler.pkl"))
+        if pipeline_path:
+            shutil.copyfile(pipeline_path, os.path.join(tmp_dir, "pipeline.npz"))
+        meta = {"source": source, "name": y.name, "shape": list(np.shape(X)), "created": time.time()}
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as file:
+            json.dump(meta, file)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def load_cache_entry(entry_dir):
+    """
+    Open a cache entry with X and y memory-mapped read-only. Returns None if the entry is unreadable.
+    """
+    try:
+        with open(os.path.join(entry_dir, "meta.json")) as file:
+            meta = json.load(file)
+        X = np.load(os.path.join(entry_dir, "X.npy"), mmap_mode="r")
+        y_values = np.load(os.path.join(entry_dir, "y.npy"), mmap_mode="r")
+        y_index = np.load(os.path.join(entry_dir, "y_index.npy"), mmap_mode="r")
+        scaler = joblib.load(os.path.join(entry_dir, "scaler.pkl"))
+    except (OSError, ValueError, EOFError) as e:
+        print(f"Ignoring unreadable cache entry {entry_dir}: {e}")
+        return None
+
+    # Touch the entry so eviction treats it as recently used
+    os.utime(os.path.join(entry_dir, "meta.json"))
+    y = pd.Series(y_values, index=y_index, name=meta.get("name"), copy=False)
+    return X, y, scaler
+
+
+def evict_cache(cache_dir=DEFAULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_age=MAX_CACHE_AGE_SECONDS):
+    """
+    Remove entries not used within max_age seconds, then the least recently used
+    ones until the cache fits in max_bytes.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    now = time.time()
+    entries = []
+    evicted = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        if not os.path.isdir(entry_dir):
+            continue
+        meta_path = os.path.join(entry_dir, "meta.json")
+        # Temporary directories (in-flight or interrupted writes) have no metadata yet
+        last_used = os.path.getmtime(meta_path if os.path.exists(meta_path) else entry_dir)
+        size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+        if name.startswith(".tmp-"):
+            # Another process may still be writing it: only clean up abandoned ones
+            if now - last_used > max_age:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                evicted.append(entry_dir)
+            continue
+        entries.append((last_used, size, entry_dir))
+
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for last_used, size, entry_dir in entries:
+        if now - last_used <= max_age and total <= max_bytes:
+            continue
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        evicted.append(entry_dir)
+
+    if evicted:
+        print(f"Evicted {len(evicted)} cache entries from {cache_dir}")
+    return evicted
@@ -0,0 +1,201 @@
+import numpy as np
+
+# Raw CloudWatch metrics the default rules refer to
+CPU = "CPU_Utilization"
+MEMORY = "Memory_Usage_MB"
+DISK_IO = "Disk_IO_MBps"
+NETWORK_IN = "Network_In_Mbps"
+NETWORK_OUT = "Network_Out_Mbps"
+ERROR_RATE = "Error_Rate_Percentage"
+
+# Each rule is a plain dict:
+#   name    - label used in the results
+#   metric  - raw column the rule reads
+#   kind    - "threshold": the value itself
+#             "deviation": |value - center|
+#             "rate":      (value[t] - value[t - periods]) / periods, i.e. change per period
+#   op      - one of ">", ">=", "<", "<=", compared against `value`
+#   n, m    - optional N-of-M condition: fire when the comparison held in at least
+#             n of the last m periods (default 1 of 1, i.e. the current period only)
+DEFAULT_RULES = [
+    # Same check as threshold_based_anomaly_detection: CPU more than 20% away from 50
+    {"name": "cpu_deviation", "metric": CPU, "kind": "deviation", "center": 50, "op": ">", "value": 10},
+    {"name": "cpu_saturated", "metric": CPU, "kind": "threshold", "op": ">=", "value": 90, "n": 3, "m": 5},
+    {"name": "memory_high", "metric": MEMORY, "kind": "threshold", "op": ">", "value": 3800, "n": 3, "m": 3},
+    {"name": "memory_growth", "metric": MEMORY, "kind": "rate", "periods": 5, "op": ">", "value": 200},
+    {"name": "disk_io_spike", "metric": DISK_IO, "kind": "rate", "periods": 1, "op": ">", "value": 50},
+    {"name": "network_in_drop", "metric": NETWORK_IN, "kind": "threshold", "op": "<", "value": 50, "n": 2, "m": 3},
+    {"name": "network_out_drop", "metric": NETWORK_OUT, "kind": "threshold", "op": "<", "value": 50, "n": 2, "m": 3},
+    {"name": "error_rate_high", "metric": ERROR_RATE, "kind": "threshold", "op": ">", "value": 4.5, "n": 2, "m": 5},
+]
+
+_OPS = {">": (1.0, True), ">=": (1.0, False), "<": (-1.0, True), "<=": (-1.0, False)}
+
+
+class CompiledRules:
+    """
+    A rule list compiled so that all rules are evaluated in a few vectorized passes.
+
+    An N-of-M rule "x > t held in at least n of the last m periods" fires exactly
+    when the n-th largest x in that window is > t, and a "<" rule is a ">" rule on
+    -x against -t. So rules are grouped by (derived series, sign, n, m): each group
+    needs one window statistic per row, however many thresholds it holds, and each
+    rule is then a single comparison against it. Each distinct derived series (a
+    metric as-is, its deviation from a center, or its rate over some number of
+    periods) is computed once.
+    Rows are processed in chunks of chunk_rows (plus the history the windows and
+    rates need) so the working arrays stay in cache.
+    """
+
+    def __init__(self, rules, chunk_rows=65536):
+        self.rules = list(rules)
+        self.names = [rule["name"] for rule in self.rules]
+        self.metrics = sorted({rule["metric"] for rule in self.rules})
+        metric_index = {metric: j for j, metric in enumerate(self.metrics)}
+
+        series = {}
+        groups = {}
+        thresholds = np.empty(len(self.rules))
+        strict = np.empty(len(self.rules), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            kind = rule.get("kind", "threshold")
+            if kind == "threshold":
+                key = (kind, metric_index[rule["metric"]], None)
+            elif kind == "deviation":
+                key = (kind, metric_index[rule["metric"]], float(rule["center"]))
+            elif kind == "rate":
+                periods = int(rule.get("periods", 1))
+                if periods < 1:
+                    raise ValueError(f"Rule {rule['name']!r}: periods must be at least 1")
+                key = (kind, metric_index[rule["metric"]], periods)
+            else:
+                raise ValueError(f"Rule {rule['name']!r}: unknown kind {kind!r}")
+            if rule["op"] not in _OPS:
+                raise ValueError(f"Rule {rule['name']!r}: unknown op {rule['op']!r}")
+            sign, strict[i] = _OPS[rule["op"]]
+            n, m = int(rule.get("n", 1)), int(rule.get("m", 1))
+            if not 1 <= n <= m:
+                raise ValueError(f"Rule {rule['name']!r}: need 1 <= n <= m, got n={n}, m={m}")
+            thresholds[i] = sign * float(rule["value"])
+            groups.setdefault((series.setdefault(key, len(series)), sign, n, m), []).append(i)
+
+        self.series = list(series)
+        self.groups = []
+        for (source, sign, n, m), rule_ids in groups.items():
+            rule_ids = np.asarray(rule_ids, dtype=np.intp)
+            self.groups.append({
+                "source": source, "sign": sign, "n": n, "m": m, "rule_ids": rule_ids,
+                "threshold": thresholds[rule_ids], "strict": strict[rule_ids],
+            })
+        # Rows of history a chunk needs before its first row
+        max_periods = max([key[2] for key in self.series if key[0] == "rate"], default=0)
+        self.context = max_periods + max([group["m"] for group in self.groups], default=1) - 1
+        self.chunk_rows = chunk_rows
+
+    def _derived(self, columns):
+        # One contiguous row per distinct series; rates are NaN until enough history exists
+        D = np.empty((len(self.series), len(columns[0]) if columns else 0))
+        for j, (kind, column, parameter) in enumerate(self.series):
+            values = columns[column]
+            if kind == "threshold":
+                D[j] = values
+            elif kind == "deviation":
+                np.abs(values - parameter, out=D[j])
+            else:
+                D[j, :parameter] = np.nan
+                np.subtract(values[parameter:], values[:-parameter], out=D[j, parameter:])
+                D[j, parameter:] /= parameter
+        return D, np.isnan(D).any(axis=1)
+
+    @staticmethod
+    def _window_statistic(values, n, m):
+        # n-th largest of the last m values; missing periods count as never firing
+        if m == 1:
+            return values
+        padded = np.concatenate([np.full(m - 1, -np.inf), values])
+        lagged = [padded[m - 1 - lag:len(padded) - lag] for lag in range(m)]
+        if n == 1 or n == m:
+            reduce = np.maximum if n == 1 else np.minimum
+            statistic = values
+            for window_values in lagged[1:]:
+                reduce(statistic, window_values, out=statistic)
+            return statistic
+        # The n-th largest is minus the (m - n + 1)-th largest of the negated values;
+        # track whichever rank is smaller
+        flip = n > (m + 1) // 2
+        rank = m - n + 1 if flip else n
+        # Keep the `rank` largest values seen so far, sorted, by insertion: each lagged
+        # copy bubbles down through the top arrays with elementwise max/min
+        top = [-values if flip else values]
+        for window_values in lagged[1:]:
+            candidate = -window_values if flip else window_values.copy()
+            for position in range(min(len(top), rank)):
+                larger = np.maximum(top[position], candidate)
+                np.minimum(top[position], candidate, out=candidate)
+                top[position] = larger
+            if len(top) < rank:
+                top.append(candidate)
+        return -top[rank - 1] if flip else top[rank - 1]
+
+    def evaluate(self, data, return_matrix=False):
+        """
+        Evaluate every rule on every row of data (a DataFrame, or a dict of equal-length
+        arrays, holding at least the metrics the rules use), in row order.
+
+        Returns a dict with:
+          "anomaly"   - bool per row, any rule fired
+          "n_fired"   - number of rules fired per row
+          "rule_hits" - {rule name: rows it fired on}
+          "matrix"    - (rows x rules) bools, only with return_matrix=True
+        """
+        columns = [np.asarray(data[metric], dtype=np.float64) for metric in self.metrics]
+        n_rows = len(columns[0]) if columns else 0
+        n_fired = np.zeros(n_rows, dtype=np.int32)
+        hits = np.zeros(len(self.rules), dtype=np.int64)
+        matrix = np.empty((n_rows, len(self.rules)), dtype=bool) if return_matrix else None
+
+        for start in range(0, n_rows, self.chunk_rows):
+            end = min(start + self.chunk_rows, n_rows)
+            context_start = max(start - self.context, 0)
+            lead = start - context_start
+            D, has_nan = self._derived([column[context_start:end] for column in columns])
+            chunk_fired = n_fired[start:end]
+
+            for group in self.groups:
+                values = D[group["source"]] * group["sign"]
+                if has_nan[group["source"]]:
+                    # NaN never fires; -inf loses every ">" comparison and every window ranking
+                    values[np.isnan(values)] = -np.inf
+                statistic = self._window_statistic(values, group["n"], group["m"])[lead:]
+                rule_ids, threshold, strict = group["rule_ids"], group["threshold"], group["strict"]
+                # Count fired rules in a uint8 buffer (adding bools into int32 is several
+                # times slower) and fold it into the row totals every 255 rules
+                counts = np.zeros(len(statistic), dtype=np.uint8)
+                for k, (rule_id, rule_threshold, rule_strict) in enumerate(zip(rule_ids, threshold, strict)):
+                    fired = statistic > rule_threshold if rule_strict else statistic >= rule_threshold
+                    np.add(counts, fired.view(np.uint8), out=counts)
+                    hits[rule_id] += np.count_nonzero(fired)
+                    if k % 255 == 254:
+                        chunk_fired += counts
+                        counts[:] = 0
+                chunk_fired += counts
+                if matrix is not None:
+                    matrix[start:end, rule_ids] = np.where(strict, statistic[:, None] > threshold,
+                                                           statistic[:, None] >= threshold)
+
+        results = {
+            "anomaly": n_fired > 0,
+            "n_fired": n_fired,
+            "rule_hits": dict(zip(self.names, hits.tolist())),
+        }
+        if matrix is not None:
+            results["matrix"] = matrix
+        return results
+
+
+def evaluate_rules(data, rules=DEFAULT_RULES, return_matrix=False):
+    """
+    Compile and evaluate a rule list in one go. Compile once with CompiledRules
+    when the same rules run repeatedly.
+    """
+    return CompiledRules(rules).evaluate(data, return_matrix=return_matrix)
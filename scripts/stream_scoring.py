@@ -0,0 +1,139 @@
+import time
+
+import numpy as np
+
+from scripts.anomaly_detection import threshold_based_anomaly_detection
+
+
+class StreamingAnomalyScorer:
+    """
+    Score live metric datapoints one at a time against a trained Isolation Forest.
+
+    Points are appended to a preallocated micro-batch and scored together when
+    the batch is full or when the oldest pending point would otherwise miss its
+    max_latency_ms budget: a running estimate of the scoring time per point
+    (which rises at once after a slow flush and decays slowly) is reserved out
+    of the budget. Each push() is O(1) and the model is called once per batch.
+    Every verdict combines three rules on the raw point:
+    - the Isolation Forest decision (after the optional PreprocessingPipeline),
+    - threshold_based_anomaly_detection on the CPU column,
+    - a rolling z-score against the previous `window` points of each metric.
+    The rolling window lives in a fixed-size buffer of the last `window` raw points.
+    """
+
+    def __init__(self, model, pipeline=None, n_features=None, window=60, cpu_index=0, cpu_threshold=50,
+                 z_threshold=3.0, max_batch=4096, max_latency_ms=50.0, clock=time.monotonic):
+        if n_features is None:
+            n_features = len(pipeline.input_columns) if pipeline is not None else model.n_features_in_
+        self.model = model
+        self.pipeline = pipeline
+        self.window = window
+        self.cpu_index = cpu_index
+        self.cpu_threshold = cpu_threshold
+        self.z_threshold = z_threshold
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000.0
+        self.clock = clock
+
+        self._batch = np.empty((max_batch, n_features))
+        self._pending = 0
+        self._oldest = None
+        # Last `window` raw points in arrival order, right-aligned while filling up
+        self._history = np.zeros((window, n_features))
+        self._seen = 0
+        self._seconds_per_point = 0.0  # Scoring cost estimate; unknown until the first flush
+
+    def push(self, point):
+        """
+        Add one raw datapoint. Returns the verdicts for the pending batch if it was
+        flushed (batch full or latency budget used up), otherwise None.
+        """
+        if self._pending == 0:
+            self._oldest = self.clock()
+        self._batch[self._pending] = point
+        self._pending += 1
+        if self._pending == self.max_batch or self._due():
+            return self.flush()
+        return None
+
+    def push_many(self, points):
+        """
+        Add a block of datapoints (e.g. one GetMetricData page). Returns the list of flushed verdicts.
+        """
+        results = []
+        points = np.asarray(points, dtype=np.float64)
+        start = 0
+        while start < len(points):
+            if self._pending == 0:
+                self._oldest = self.clock()
+            take = min(self.max_batch - self._pending, len(points) - start)
+            self._batch[self._pending:self._pending + take] = points[start:start + take]
+            self._pending += take
+            start += take
+            if self._pending == self.max_batch or self._due():
+                results.append(self.flush())
+        return results
+
+    def poll(self):
+        """
+        Flush if the oldest pending point is about to miss its latency budget. Call
+        this from a timer so verdicts are not held back when traffic stops.
+        """
+        if self._pending and self._due():
+            return self.flush()
+        return None
+
+    def _due(self):
+        # Time waited so far plus the time scoring the batch will take
+        return self.clock() - self._oldest + self._pending * self._seconds_per_point >= self.max_latency
+
+    def flush(self):
+        """
+        Score every pending point and return the verdicts as a dict of arrays.
+        """
+        n = self._pending
+        if n == 0:
+            return None
+        started = self.clock()
+        raw = self._batch[:n]
+
+        # Isolation Forest on the preprocessed batch
+        features = self.pipeline.transform(raw) if self.pipeline is not None else raw
+        scores = self.model.score_samples(features)
+        forest_anomalies = scores - self.model.offset_ < 0
+
+        # Static CPU threshold rule
+        cpu_anomalies = threshold_based_anomaly_detection(raw[:, self.cpu_index], self.cpu_threshold)
+
+        # Rolling z-score over the previous `window` points, from cumulative sums
+        history = min(self._seen, self.window)
+        stacked = np.concatenate([self._history[self.window - history:], raw])
+        centered = stacked - stacked[0]  # Keeps the sums of squares well conditioned
+        zeros = np.zeros((1, stacked.shape[1]))
+        csum = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+        csum_sq = np.concatenate([zeros, np.cumsum(centered ** 2, axis=0)])
+        end = np.arange(history, history + n)
+        begin = np.maximum(end - self.window, 0)
+        count = (end - begin)[:, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (csum[end] - csum[begin]) / count
+            var = (csum_sq[end] - csum_sq[begin]) / count - mean ** 2
+            z = np.abs(centered[history:] - mean) / np.sqrt(np.maximum(var, 0))
+        # Only judge points whose window is full; a flat window (std 0) fires on any change
+        z_anomalies = ((z > self.z_threshold) & (count >= self.window)).any(axis=1)
+
+        # Slide the window forward
+        tail = stacked[-self.window:]
+        self._history[self.window - len(tail):] = tail
+        self._seen += n
+
+        self._pending = 0
+        self._oldest = None
+        self._seconds_per_point = max((self.clock() - started) / n, 0.9 * self._seconds_per_point)
+        return {
+            "score": scores,
+            "isolation_forest": forest_anomalies,
+            "cpu_threshold": cpu_anomalies,
+            "rolling_zscore": z_anomalies,
+            "anomaly": forest_anomalies | cpu_anomalies | z_anomalies,
+        }